@@ -0,0 +1,163 @@
+# batch.py
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import SolveCache
+from instance_io import check_dimensions, load_instance
+from methods import calculate_total_cost, solve
+
+FORMATS = ('jsonl', 'csv')
+MATRIX_FIELDS = ('costs', 'supply', 'demand')
+CSV_FIELDS = ('id', 'method', 'total_cost', 'num_steps', 'allocations', 'error')
+
+# Una caché por proceso de trabajo y directorio; todas comparten los archivos en disco
+caches = {}
+
+def record_cache(directory):
+    if directory not in caches:
+        caches[directory] = SolveCache(directory=directory)
+    return caches[directory]
+
+def read_records(stream, fmt):
+    # Las líneas JSONL se pasan sin decodificar; se decodifican en el proceso de trabajo
+    if fmt == 'jsonl':
+        for line in stream:
+            if line.strip():
+                yield line
+    else:
+        yield from csv.DictReader(stream)
+
+# Opciones de methods.solve que puede traer un registro, con su conversión
+SOLVE_OPTIONS = {'start': str, 'max_iterations': int, 'time_limit': float}
+
+def read_record(record):
+    # Devuelve (cost_matrix, supply, demand) con las mismas conversiones y
+    # validaciones que la interfaz gráfica
+    data = {}
+    if record.get('file'):
+        # La instancia está en un archivo (JSON, CSV o .npy con oferta y demanda aparte)
+        data['costs'], data['supply'], data['demand'] = load_instance(
+            record['file'], record.get('supply_file') or None, record.get('demand_file') or None)
+    else:
+        for field in MATRIX_FIELDS:
+            value = record[field]
+            data[field] = json.loads(value) if isinstance(value, str) else value
+
+    cost_matrix = data['costs'] if record.get('file') else [[float(c) for c in row] for row in data['costs']]
+    supply = [float(s) for s in data['supply']]
+    demand = [float(d) for d in data['demand']]
+    check_dimensions(cost_matrix, supply, demand)
+    if sum(supply) != sum(demand):
+        raise ValueError("El problema no está balanceado. La oferta total y la demanda total deben ser iguales.")
+    return cost_matrix, supply, demand
+
+def record_options(record):
+    return {field: convert(record[field]) for field, convert in SOLVE_OPTIONS.items()
+            if record.get(field) not in (None, '')}
+
+def solve_record(record, index, include_steps=False, cache_dir=None):
+    result = {'id': index}
+    try:
+        if isinstance(record, str):
+            record = json.loads(record)
+        result['id'] = record.get('id', index)
+        result['method'] = record.get('method', '')
+        cost_matrix, supply, demand = read_record(record)
+        options = record_options(record)
+        if cache_dir:
+            steps = record_cache(cache_dir).solve(result['method'], cost_matrix, supply, demand, **options)
+        else:
+            steps = solve(result['method'], cost_matrix, supply, demand, **options)
+        allocations = steps[-1]['allocations']
+        result['total_cost'] = calculate_total_cost(allocations, cost_matrix)
+        result['num_steps'] = len(steps)
+        result['allocations'] = allocations
+        if include_steps:
+            result['steps'] = steps
+    except Exception as error:  # Un registro con problemas (p. ej. RecursionError) solo falla él
+        result['error'] = error_message(error)
+    return result
+
+def error_message(error):
+    if isinstance(error, KeyError):
+        return f"Falta el campo {error}"
+    return str(error) or type(error).__name__
+
+def solve_stream(records, workers=None, window=None, include_steps=False, cache_dir=None):
+    # Resuelve los registros en paralelo y los devuelve en el orden de entrada,
+    # con como mucho `window` instancias en memoria al mismo tiempo.
+    if workers == 0:
+        for index, record in enumerate(records):
+            yield solve_record(record, index, include_steps, cache_dir)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    window = window or 4 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for index, record in enumerate(records):
+            if len(pending) >= window:
+                yield pending.popleft().result()
+            pending.append(pool.submit(solve_record, record, index, include_steps, cache_dir))
+        while pending:
+            yield pending.popleft().result()
+
+def write_results(results, stream, fmt):
+    if fmt == 'jsonl':
+        for result in results:
+            stream.write(json.dumps(result, ensure_ascii=False) + '\n')
+            stream.flush()
+        return
+
+    writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for result in results:
+        row = dict(result)
+        if 'allocations' in row:
+            row['allocations'] = json.dumps(row['allocations'])
+        writer.writerow(row)
+        stream.flush()
+
+def guess_format(path, default='jsonl'):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return extension if extension in FORMATS else default
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Resuelve problemas de transporte por lotes, sin interfaz gráfica.")
+    parser.add_argument('input', nargs='?', default='-',
+                        help="archivo JSONL o CSV con campos costs, supply, demand (o file) y method ('-' para stdin)")
+    parser.add_argument('-o', '--output', default='-', help="archivo de resultados ('-' para stdout)")
+    parser.add_argument('--input-format', choices=FORMATS, help="formato de entrada (por defecto según la extensión)")
+    parser.add_argument('--output-format', choices=FORMATS, help="formato de salida (por defecto según la extensión)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="procesos de trabajo (0 resuelve en el proceso actual)")
+    parser.add_argument('--window', type=int, default=None,
+                        help="instancias en vuelo como máximo (por defecto 4 por proceso)")
+    parser.add_argument('--steps', action='store_true', help="incluir todos los pasos en la salida")
+    parser.add_argument('--cache-dir', help="directorio donde guardar y reutilizar las instancias ya resueltas")
+    args = parser.parse_args(argv)
+
+    input_format = args.input_format or guess_format(args.input)
+    output_format = args.output_format or guess_format(args.output)
+
+    source = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8')
+    target = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        records = read_records(source, input_format)
+        results = solve_stream(records, args.workers, args.window, args.steps, args.cache_dir)
+        write_results(results, target, output_format)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# benchmark.py
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from methods import (
+    northwest_corner_method,
+    vogel_approximation_method,
+    minimum_cost_method,
+    russell_approximation_method,
+    stepping_stone_method,
+    modi_method,
+    min_cost_flow_method,
+    calculate_total_cost
+)
+from instrumentation import SolverStats
+
+# Generadores de instancias balanceadas y reproducibles a partir de una semilla
+
+def split_total(rng, total, parts, step=1):
+    # Reparte total en parts cantidades positivas múltiplos de step
+    units = total // step
+    cuts = sorted(rng.sample(range(1, units), parts - 1)) if parts > 1 else []
+    return [(b - a) * step for a, b in zip([0] + cuts, cuts + [units])]
+
+def uniform_instance(m, n, seed):
+    rng = random.Random(seed)
+    cost_matrix = [[rng.randint(1, 100) for _ in range(n)] for _ in range(m)]
+    supply = [rng.randint(10, 100) for _ in range(m)]
+    demand = split_total(rng, sum(supply), n)
+    return cost_matrix, supply, demand
+
+def clustered_instance(m, n, seed, clusters=4):
+    # Proveedores y consumidores agrupados en regiones; el costo es la distancia
+    rng = random.Random(seed)
+    centers = [(rng.uniform(0, 1000), rng.uniform(0, 1000)) for _ in range(clusters)]
+
+    def point():
+        x, y = rng.choice(centers)
+        return x + rng.gauss(0, 60), y + rng.gauss(0, 60)
+
+    sources = [point() for _ in range(m)]
+    sinks = [point() for _ in range(n)]
+    cost_matrix = [[round(math.dist(s, t)) for t in sinks] for s in sources]
+    supply = [rng.randint(10, 100) for _ in range(m)]
+    demand = split_total(rng, sum(supply), n)
+    return cost_matrix, supply, demand
+
+def degenerate_instance(m, n, seed):
+    # Cantidades redondas que hacen coincidir sumas parciales de oferta y demanda
+    rng = random.Random(seed)
+    cost_matrix = [[rng.randint(1, 20) for _ in range(n)] for _ in range(m)]
+    supply = [rng.choice((10, 20, 30, 50)) for _ in range(m)]
+    total = sum(supply)
+    demand = split_total(rng, total, n, step=10) if total // 10 >= n else [0] * n
+    if not any(demand):
+        demand = [total // n] * n
+        demand[-1] += total - sum(demand)
+    return cost_matrix, supply, demand
+
+def rectangular_instance(m, n, seed):
+    # Pocas filas y muchas columnas: la instancia de tamaño (m, n) pasa a (m/4, 8 n)
+    rng = random.Random(seed)
+    rows, cols = max(m // 4, 1), 8 * n
+    cost_matrix = [[rng.randint(1, 100) for _ in range(cols)] for _ in range(rows)]
+    supply = [rng.randint(10, 100) * cols for _ in range(rows)]
+    demand = split_total(rng, sum(supply), cols)
+    return cost_matrix, supply, demand
+
+FAMILIES = {
+    'uniform': uniform_instance,
+    'clustered': clustered_instance,
+    'degenerate': degenerate_instance,
+    'rectangular': rectangular_instance,
+}
+
+# Los métodos de optimización parten de la esquina noroeste, igual que la interfaz
+METHODS = {
+    'northwest_corner_method': northwest_corner_method,
+    'vogel_approximation_method': vogel_approximation_method,
+    'minimum_cost_method': minimum_cost_method,
+    'russell_approximation_method': russell_approximation_method,
+    'stepping_stone_method': stepping_stone_method,
+    'modi_method': modi_method,
+    'min_cost_flow_method': min_cost_flow_method,
+}
+OPTIMIZERS = ('stepping_stone_method', 'modi_method')
+# Métodos exactos: deben llegar al mismo Z óptimo y cuentan pivotes (o caminos aumentantes)
+EXACT_METHODS = OPTIMIZERS + ('min_cost_flow_method',)
+# Los que compara --check si no se indican otros con --methods
+CHECK_METHODS = EXACT_METHODS
+
+def run_method(name, cost_matrix, supply, demand, start, instrumentation=None):
+    if name in OPTIMIZERS:
+        return METHODS[name](start, cost_matrix, instrumentation=instrumentation)
+    if name in EXACT_METHODS:
+        return METHODS[name](cost_matrix, supply, demand, instrumentation=instrumentation)
+    return METHODS[name](cost_matrix, supply, demand)
+
+def measure(name, cost_matrix, supply, demand, repeat=5, memory=True):
+    start = None
+    if name in OPTIMIZERS:
+        start = northwest_corner_method(cost_matrix, supply, demand, final_only=True)[-1]['allocations']
+
+    # El conteo de pivotes va en una ejecución aparte para no alterar los tiempos
+    stats = SolverStats()
+    if name in EXACT_METHODS:
+        run_method(name, cost_matrix, supply, demand, start, stats)
+
+    seconds = math.inf
+    for _ in range(repeat):
+        began = time.perf_counter()
+        steps = run_method(name, cost_matrix, supply, demand, start)
+        seconds = min(seconds, time.perf_counter() - began)
+
+    peak_bytes = None
+    if memory:
+        tracemalloc.start()
+        run_method(name, cost_matrix, supply, demand, start)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'seconds': seconds,
+        'peak_bytes': peak_bytes,
+        'steps': len(steps),
+        'pivots': stats.pivots if name in EXACT_METHODS else None,
+        'total_cost': calculate_total_cost(steps[-1]['allocations'], cost_matrix),
+    }
+
+def run_benchmarks(sizes, families, methods, seed=0, repeat=5, memory=True, log=None):
+    results = []
+    for family in families:
+        for size in sizes:
+            cost_matrix, supply, demand = FAMILIES[family](size, size, seed)
+            m, n = len(supply), len(demand)
+            for name in methods:
+                result = {'family': family, 'm': m, 'n': n, 'method': name}
+                result.update(measure(name, cost_matrix, supply, demand, repeat, memory))
+                results.append(result)
+                if log is not None:
+                    log(f"{family:12} {m:>4}x{n:<4} {name:28} {result['seconds']:10.4f} s  Z={result['total_cost']}")
+    return results
+
+def check_optimal(sizes, families, seeds, methods=CHECK_METHODS, log=None):
+    # Comprueba que los métodos exactos llegan al mismo Z; devuelve las discrepancias
+    mismatches = []
+    for family in families:
+        for size in sizes:
+            for seed in seeds:
+                cost_matrix, supply, demand = FAMILIES[family](size, size, seed)
+                start = northwest_corner_method(cost_matrix, supply, demand, final_only=True)[-1]['allocations']
+                costs = {name: calculate_total_cost(run_method(name, cost_matrix, supply, demand, start)[-1]['allocations'],
+                                                    cost_matrix)
+                         for name in methods}
+                reference = costs[methods[0]]
+                if any(not math.isclose(z, reference) for z in costs.values()):
+                    mismatches.append((family, size, seed, costs))
+                if log is not None:
+                    log(f"{family:12} {len(supply):>4}x{len(demand):<4} semilla {seed:<3} "
+                        + "  ".join(f"{name}={z}" for name, z in costs.items()))
+    return mismatches
+
+def result_key(result):
+    return result['family'], result['m'], result['n'], result['method']
+
+def compare(results, baseline, tolerance=0.25, min_seconds=0.005):
+    # Devuelve las regresiones: distinto Z o más lento que la base más la tolerancia
+    # relativa y min_seconds, el margen absoluto que cubre el ruido de las
+    # mediciones cortas (planificador, caché, frecuencia del procesador)
+    previous = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        if result['seconds'] > old['seconds'] * (1 + tolerance) + min_seconds:
+            regressions.append((result, old, f"tiempo {old['seconds']:.4f} s -> {result['seconds']:.4f} s"))
+        if result['total_cost'] != old['total_cost']:
+            regressions.append((result, old, f"Z {old['total_cost']} -> {result['total_cost']}"))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide los métodos de transporte con instancias generadas.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 10, 20])
+    parser.add_argument('--families', nargs='+', choices=list(FAMILIES), default=list(FAMILIES))
+    parser.add_argument('--methods', nargs='+', choices=list(METHODS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help="repeticiones por medición (se guarda el mínimo)")
+    parser.add_argument('--no-memory', action='store_true', help="no medir el pico de memoria")
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help="archivo de resultados")
+    parser.add_argument('--baseline', help="resultados anteriores con los que comparar")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="aumento de tiempo admitido (0.25 = 25%%)")
+    parser.add_argument('--min-seconds', type=float, default=0.005,
+                        help="margen absoluto admitido además de la tolerancia, en segundos")
+    parser.add_argument('--check', type=int, metavar='SEMILLAS',
+                        help="en lugar de medir, comprobar con tantas semillas que los métodos exactos dan el mismo Z")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        exact = [name for name in args.methods or CHECK_METHODS if name in EXACT_METHODS]
+        if not exact:
+            parser.error("--check necesita al menos un método exacto: " + ", ".join(EXACT_METHODS))
+        mismatches = check_optimal(args.sizes, args.families, range(args.seed, args.seed + args.check), exact, log=print)
+        for family, size, seed, costs in mismatches:
+            print(f"DISCREPANCIA {family} {size} semilla {seed}: {costs}")
+        if mismatches:
+            sys.exit(1)
+        return
+
+    results = run_benchmarks(args.sizes, args.families, args.methods or list(METHODS), args.seed, args.repeat,
+                             not args.no_memory, log=print)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump({'python': platform.python_version(), 'platform': platform.platform(),
+                   'seed': args.seed, 'repeat': args.repeat, 'results': results}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        for result, _, reason in regressions:
+            print(f"REGRESIÓN {result['family']} {result['m']}x{result['n']} {result['method']}: {reason}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# cache.py
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+
+from methods import iter_solve, method_code
+from step_trace import StepTrace
+
+CACHE_EXTENSION = '.strc'
+
+def instance_key(method, cost_matrix, supply, demand, final_only=False, **options):
+    # Hash canónico de la instancia: código del método, opciones, dimensiones y
+    # todos los números como float de 64 bits, así que 1, 1.0 y -0.0/0.0 coinciden
+    header = {'method': method_code(method), 'final_only': bool(final_only),
+              'm': len(supply), 'n': len(demand), 'options': options}
+    digest = hashlib.sha256(json.dumps(header, sort_keys=True, default=str).encode('utf-8'))
+    for row in cost_matrix:
+        digest.update(array('d', [float(c) + 0.0 for c in row]).tobytes())
+    digest.update(array('d', [float(s) + 0.0 for s in supply]).tobytes())
+    digest.update(array('d', [float(d) + 0.0 for d in demand]).tobytes())
+    return digest.hexdigest()
+
+class SolveCache:
+    # Pasos de las instancias ya resueltas, guardados como StepTrace. En memoria se
+    # conservan las usadas más recientemente, hasta max_entries y max_memory_bytes
+    # (según StepTrace.estimated_bytes); con directory también se guardan en disco,
+    # hasta max_disk_bytes (se borran primero los archivos que llevan más tiempo sin
+    # usarse). Se puede usar desde varios hilos.
+    def __init__(self, max_entries=128, directory=None, max_disk_bytes=256 * 2**20, max_memory_bytes=64 * 2**20):
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = OrderedDict()  # clave -> (traza, bytes estimados)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def solve(self, method, cost_matrix, supply, demand, final_only=False, **options):
+        return list(self.iter_solve(method, cost_matrix, supply, demand, final_only, **options))
+
+    def iter_solve(self, method, cost_matrix, supply, demand, final_only=False, **options):
+        # Como methods.iter_solve. Una instancia solo se guarda si se recorren todos
+        # sus pasos (si el cálculo se cancela o falla no queda nada en la caché).
+        # Con final_only también sirve la traza completa de la misma instancia.
+        # cancel no forma parte de la clave, y un cálculo cancelado no se guarda.
+        cancel = options.pop('cancel', None)
+        key = instance_key(method, cost_matrix, supply, demand, final_only, **options)
+        keys = [key]
+        if final_only:
+            keys.append(instance_key(method, cost_matrix, supply, demand, False, **options))
+        steps = self.lookup(*keys)
+        if steps is not None:
+            # Los pasos se reconstruyen de la traza a medida que se piden
+            if final_only:
+                yield steps[-1]
+            else:
+                yield from steps
+            return
+
+        trace = None
+        for step in iter_solve(method, cost_matrix, supply, demand, final_only, cancel=cancel, **options):
+            if trace is None:
+                trace = StepTrace(len(supply), len(demand))
+            trace.append(step)
+            yield step
+        if trace is not None and not (cancel is not None and cancel.is_set()):
+            self.put(key, trace)
+
+    def lookup(self, *keys):
+        # Traza de la primera clave guardada (en memoria o en disco), o None. Es una
+        # vista propia de la guardada, así que varios hilos pueden leer la misma.
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is not None:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0].view()
+        for key in keys:
+            trace = self._load(key)
+            if trace is not None:
+                with self.lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._remember(key, trace)
+                    return trace.view()
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, trace):
+        with self.lock:
+            self._remember(key, trace)
+        if self.directory:
+            self._store(key, trace)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.memory_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'entries': len(self.entries),
+                'memory_bytes': self.memory_bytes,
+                'evictions': self.evictions,
+                'disk_evictions': self.disk_evictions,
+            }
+
+    def _remember(self, key, trace):
+        # Una traza mayor que max_memory_bytes no se queda en memoria (sí en disco)
+        if key in self.entries:
+            self.memory_bytes -= self.entries.pop(key)[1]
+        size = trace.estimated_bytes()
+        self.entries[key] = (trace, size)
+        self.memory_bytes += size
+        while self.entries and (len(self.entries) > self.max_entries or self.memory_bytes > self.max_memory_bytes):
+            self.memory_bytes -= self.entries.popitem(last=False)[1][1]
+            self.evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + CACHE_EXTENSION)
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            trace = StepTrace.load(path)
+            os.utime(path)  # La fecha de modificación marca el último uso
+        except (OSError, ValueError, zlib.error, struct.error):
+            return None
+        return trace
+
+    def _store(self, key, trace):
+        # Se escribe en un archivo temporal y se renombra, así otro proceso nunca
+        # lee un archivo a medio escribir
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            trace.save(temporary)
+            os.replace(temporary, self._path(key))
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(CACHE_EXTENSION):
+                try:
+                    info = entry.stat()
+                except OSError:
+                    continue
+                files.append((info.st_mtime, info.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # Otro proceso ya lo borró
+            total -= size
+            with self.lock:
+                self.disk_evictions += 1
@@ -0,0 +1,142 @@
+# components.py
+
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sparse import SparseCostMatrix, iter_sparse_solve, sparse_total_cost
+
+# Las componentes con menos rutas se resuelven en el proceso actual: enviarlas a
+# otro proceso cuesta más que resolverlas
+PARALLEL_MIN_LANES = 2000
+
+# Referencias a filas y columnas en las descripciones de los pasos de una componente
+CELL_PATTERN = re.compile(r'celda \((\d+),(\d+)\)')
+ROUTE_PATTERN = re.compile(r'S(\d+) a D(\d+)')
+
+def lane_components(matrix):
+    # Componentes conexas del grafo de rutas (proveedores y consumidores unidos por
+    # una ruta) como pares (filas, columnas) crecientes, en el orden de su primera
+    # fila o columna. Una fila o columna sin rutas es una componente por sí sola.
+    m, n = matrix.m, matrix.n
+    parent = list(range(m + n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i in range(m):
+        for k in range(matrix.row_start[i], matrix.row_start[i + 1]):
+            a, b = find(i), find(m + matrix.cols[k])
+            if a != b:
+                parent[max(a, b)] = min(a, b)  # La raíz es el menor índice de la componente
+
+    groups = {}
+    for x in range(m + n):
+        rows, cols = groups.setdefault(find(x), ([], []))
+        if x < m:
+            rows.append(x)
+        else:
+            cols.append(x - m)
+    return list(groups.values())
+
+def balanced_components(matrix, supply, demand):
+    # Componentes con algo que enviar; cada una debe estar balanceada por sí sola,
+    # porque entre componentes no hay rutas. Las sumas parciales de cantidades
+    # decimales no coinciden exactamente: se admite la misma tolerancia que sparse.py
+    components = []
+    tolerance = 1e-9 * max(1, sum(supply))
+    for rows, cols in lane_components(matrix):
+        component_supply = sum(supply[i] for i in rows)
+        component_demand = sum(demand[j] for j in cols)
+        if abs(component_supply - component_demand) > tolerance:
+            raise ValueError(f"La componente de {line_names('S', rows)} y {line_names('D', cols)} no está "
+                             f"balanceada: oferta {component_supply}, demanda {component_demand}.")
+        if component_supply > 0:
+            components.append((rows, cols))
+    return components
+
+def line_names(prefix, indices, limit=5):
+    if not indices:
+        return f"ningún {'proveedor' if prefix == 'S' else 'consumidor'}"
+    names = ", ".join(f"{prefix}{k+1}" for k in indices[:limit])
+    return names + (f" y {len(indices) - limit} más" if len(indices) > limit else "")
+
+def solve_component(method, matrix, supply, demand, final_only, start, options):
+    # Se ejecuta en un proceso de trabajo
+    return list(iter_sparse_solve(method, matrix, supply, demand, final_only, start, **options))
+
+def component_solve(method, cost_matrix, supply, demand, final_only=False, start='mcm', forbidden=None,
+                    workers=None, pivot_rule='dantzig', max_iterations=None, time_limit=None):
+    return list(iter_component_solve(method, cost_matrix, supply, demand, final_only, start, forbidden, workers,
+                                     pivot_rule, max_iterations, time_limit))
+
+def iter_component_solve(method, cost_matrix, supply, demand, final_only=False, start='mcm', forbidden=None,
+                         workers=None, pivot_rule='dantzig', max_iterations=None, time_limit=None):
+    # Resuelve por separado cada componente conexa de las rutas, las grandes en
+    # paralelo (workers=0: todas en este proceso), y devuelve los pasos con los
+    # índices originales: primero los de la componente 1, luego los de la 2, etc.,
+    # cada uno con las componentes anteriores ya resueltas. cost_matrix es una
+    # SparseCostMatrix o una matriz densa (sin rutas en las celdas None, NaN,
+    # infinitas o >= forbidden); las asignaciones tienen el mismo formato.
+    # pivot_rule y max_iterations se aplican a cada componente y time_limit
+    # (segundos) a todo el cálculo: cada componente tiene el tiempo que queda.
+    began = time.perf_counter()
+
+    def options():
+        remaining = None if time_limit is None else max(time_limit - (time.perf_counter() - began), 0)
+        return {'pivot_rule': pivot_rule, 'max_iterations': max_iterations, 'time_limit': remaining}
+
+    dense = not isinstance(cost_matrix, SparseCostMatrix)
+    matrix = SparseCostMatrix.from_dense(cost_matrix, forbidden) if dense else cost_matrix
+    if len(supply) != matrix.m or len(demand) != matrix.n:
+        raise ValueError("Las dimensiones de la matriz de costos no coinciden con la oferta y la demanda.")
+    components = balanced_components(matrix, supply, demand)
+    problems = [(matrix.submatrix(rows, cols), [supply[i] for i in rows], [demand[j] for j in cols])
+                for rows, cols in components]
+
+    large = [c for c, (sub, _, _) in enumerate(problems) if len(sub) >= PARALLEL_MIN_LANES]
+    pool = None
+    futures = {}
+    if workers != 0 and len(large) > 1:
+        pool = ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(large)))
+    try:
+        if pool is not None:
+            for c in large:
+                futures[c] = pool.submit(solve_component, method, *problems[c], final_only, start, options())
+
+        allocations = [{} for _ in range(matrix.m)]
+        total_cost = 0
+        for c, ((rows, cols), problem) in enumerate(zip(components, problems)):
+            # Las componentes pequeñas se resuelven aquí mientras los procesos trabajan
+            steps = (futures[c].result() if c in futures
+                     else solve_component(method, *problem, final_only, start, options()))
+            label = f"Componente {c+1} de {len(components)}: "
+            merged = allocations
+            for step in steps:
+                merged = [row.copy() for row in allocations] if not final_only else allocations
+                for a, row in enumerate(step['allocations']):
+                    merged[rows[a]].update((cols[b], allocation) for b, allocation in row.items())
+                if not final_only:
+                    yield {'allocations': matrix.to_dense(merged) if dense else merged,
+                           'description': label + remap_description(step['description'], rows, cols)}
+            allocations = merged
+            # Una heurística sin rutas para asignar nada no da pasos: como con las rutas
+            # agotadas en sparse.py, la componente queda sin asignar
+            if steps:
+                total_cost += sparse_total_cost(steps[-1]['allocations'], problem[0].row_costs())
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    yield {'allocations': matrix.to_dense(allocations) if dense else allocations,
+           'description': f"Se resolvieron {len(components)} componentes independientes, costo total: {total_cost}"}
+
+def remap_description(description, rows, cols):
+    description = CELL_PATTERN.sub(lambda match: f"celda ({rows[int(match[1]) - 1] + 1},"
+                                                 f"{cols[int(match[2]) - 1] + 1})", description)
+    return ROUTE_PATTERN.sub(lambda match: f"S{rows[int(match[1]) - 1] + 1} a D{cols[int(match[2]) - 1] + 1}",
+                             description)
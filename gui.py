@@ -1,23 +1,50 @@
 # gui.py
 
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
-from methods import (
-    northwest_corner_method,
-    vogel_approximation_method,
-    minimum_cost_method,
-    stepping_stone_method,
-    modi_method,
-    calculate_total_cost
-)
+from tkinter import ttk, messagebox, filedialog
+from cache import SolveCache
+from instance_io import load_instance
+from methods import START_LABELS, calculate_total_cost
+from solution_table import create_solution_table
+from step_trace import StepTrace
+
+# Cada cuánto (ms) se revisan los mensajes del hilo de cálculo y cuánto tiempo
+# como máximo se dedica a procesarlos en cada revisión
+POLL_MS = 50
+POLL_BUDGET_MS = 30
+
+# Pasos que puede adelantar el hilo de cálculo sin que la interfaz los haya recogido;
+# con la cola llena espera, así la memoria no crece en instancias grandes
+SOLVER_QUEUE_SIZE = 64
+
+# Filas y columnas que se muestran en la vista previa de una instancia cargada
+PREVIEW_SIZE = 10
+
+# Segundos que se espera a las heurísticas del portafolio antes de elegir la mejor terminada
+PORTFOLIO_TIME_BUDGET = 2.0
+
+# Soluciones iniciales de los métodos 1.4 y 1.5
+START_MODES = [(f"Método de la {START_LABELS['nwc']}", 'nwc'),
+               ("Portafolio (la mejor entre MEN, MAV, MCM y Russell)", 'portfolio')]
+
+# Volver a resolver una instancia ya vista (por ejemplo tras cambiar de método y
+# regresar) devuelve los pasos guardados sin recalcularlos
+SOLVE_CACHE = SolveCache()
 
 class MainApplication(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Solucionador de Problemas de Transporte")
         self.method_var = tk.StringVar()
+        self.start_var = tk.StringVar()
         self.num_supply_var = tk.IntVar(value=3)
         self.num_demand_var = tk.IntVar(value=3)
+        self.solver_running = False
+        self.cancel_event = None
+        self.poll_job = None
         self.configure_gui()
         self.create_widgets()
 
@@ -35,6 +62,7 @@ class MainApplication(tk.Tk):
             "1.3 Método del costo mínimo (MCM)",
             "1.4 Método del paso secuencial",
             "1.5 DIMO (método de distribución modificada)",
+            "1.6 Flujo de costo mínimo (FCM)",
         ]
 
         ttk.Label(self, text="Seleccione el método:", background='#F0F8FF').grid(row=0, column=0, sticky="w")
@@ -42,16 +70,23 @@ class MainApplication(tk.Tk):
         self.method_combo.grid(row=0, column=1)
         self.method_combo.current(0)
 
-        ttk.Label(self, text="Número de proveedores:", background='#F0F8FF').grid(row=1, column=0, sticky="w")
-        ttk.Entry(self, textvariable=self.num_supply_var).grid(row=1, column=1)
+        ttk.Label(self, text="Solución inicial (1.4 y 1.5):", background='#F0F8FF').grid(row=1, column=0, sticky="w")
+        self.start_combo = ttk.Combobox(self, values=[label for label, _ in START_MODES], textvariable=self.start_var,
+                                        state="readonly", font=('Arial', 12))
+        self.start_combo.grid(row=1, column=1)
+        self.start_combo.current(0)
 
-        ttk.Label(self, text="Número de consumidores:", background='#F0F8FF').grid(row=2, column=0, sticky="w")
-        ttk.Entry(self, textvariable=self.num_demand_var).grid(row=2, column=1)
+        ttk.Label(self, text="Número de proveedores:", background='#F0F8FF').grid(row=2, column=0, sticky="w")
+        ttk.Entry(self, textvariable=self.num_supply_var).grid(row=2, column=1)
+
+        ttk.Label(self, text="Número de consumidores:", background='#F0F8FF').grid(row=3, column=0, sticky="w")
+        ttk.Entry(self, textvariable=self.num_demand_var).grid(row=3, column=1)
 
         pastel_button_style = ttk.Style()
         pastel_button_style.configure('Pastel.TButton', font=('Arial', 12), background='#A9DFBF', foreground='black')
 
-        ttk.Button(self, text="Ingresar datos", command=self.input_data, style='Pastel.TButton').grid(row=3, column=0, columnspan=2, pady=5)
+        ttk.Button(self, text="Ingresar datos", command=self.input_data, style='Pastel.TButton').grid(row=4, column=0, columnspan=2, pady=5)
+        ttk.Button(self, text="Cargar archivo", command=self.load_file, style='Pastel.TButton').grid(row=5, column=0, columnspan=2, pady=5)
 
     def input_data(self):
         num_supply = self.num_supply_var.get()
@@ -112,6 +147,64 @@ class MainApplication(tk.Tk):
             messagebox.showerror("Error", "Todos los valores deben ser numéricos.")
             return
 
+        self.start_solve(cost_matrix, supply, demand)
+
+    def load_file(self):
+        path = filedialog.askopenfilename(title="Cargar instancia", parent=self,
+                                          filetypes=[("Instancias", "*.json *.csv *.npy"), ("Todos los archivos", "*.*")])
+        if not path:
+            return
+        supply_path = demand_path = None
+        if path.lower().endswith('.npy'):
+            vector_types = [("Vectores", "*.npy *.json *.csv *.txt"), ("Todos los archivos", "*.*")]
+            supply_path = filedialog.askopenfilename(title="Archivo de oferta", parent=self, filetypes=vector_types)
+            if not supply_path:
+                return
+            demand_path = filedialog.askopenfilename(title="Archivo de demanda", parent=self, filetypes=vector_types)
+            if not demand_path:
+                return
+
+        try:
+            cost_matrix, supply, demand = load_instance(path, supply_path, demand_path)
+        except (OSError, ValueError, TypeError, KeyError, IndexError, AttributeError) as error:
+            messagebox.showerror("Error", f"No se pudo cargar el archivo: {error}")
+            return
+        self.show_preview(path, cost_matrix, supply, demand)
+
+    def show_preview(self, path, cost_matrix, supply, demand):
+        # Solo se muestra una esquina de la instancia, sin campos editables
+        m, n = len(supply), len(demand)
+        rows, cols = min(m, PREVIEW_SIZE), min(n, PREVIEW_SIZE)
+        preview_window = tk.Toplevel(self)
+        preview_window.title(f"Vista previa - {path}")
+        preview_window.configure(bg='#F0F8FF')
+
+        summary = (f"{m} proveedores x {n} consumidores. "
+                   f"Oferta total: {sum(supply)}. Demanda total: {sum(demand)}.")
+        ttk.Label(preview_window, text=summary, background='#F0F8FF').grid(row=0, column=0, columnspan=cols + 3, pady=5)
+
+        table = tk.Frame(preview_window, bg='#F0F8FF')
+        table.grid(row=1, column=0, columnspan=cols + 3)
+        for j in range(cols):
+            tk.Label(table, text=f"D{j+1}", width=8, borderwidth=1, relief="solid", bg="#D6EAF8", font=('Arial', 12)).grid(row=0, column=j+1)
+        for i in range(rows):
+            tk.Label(table, text=f"S{i+1}", width=8, borderwidth=1, relief="solid", bg="#D6EAF8", font=('Arial', 12)).grid(row=i+1, column=0)
+            for j in range(cols):
+                tk.Label(table, text=f"{cost_matrix[i][j]}", width=8, borderwidth=1, relief="solid", font=('Arial', 12)).grid(row=i+1, column=j+1)
+            tk.Label(table, text=f"{supply[i]}", width=8, bg='#F0F8FF', font=('Arial', 12)).grid(row=i+1, column=cols+2)
+        for j in range(cols):
+            tk.Label(table, text=f"{demand[j]}", width=8, bg='#F0F8FF', font=('Arial', 12)).grid(row=rows+1, column=j+1)
+        tk.Label(table, text="Oferta", bg='#F0F8FF', font=('Arial', 12)).grid(row=0, column=cols+2)
+        tk.Label(table, text="Demanda", bg='#F0F8FF', font=('Arial', 12)).grid(row=rows+1, column=0)
+        if n > cols:
+            tk.Label(table, text="...", bg='#F0F8FF', font=('Arial', 12)).grid(row=0, column=cols+1)
+        if m > rows:
+            tk.Label(table, text="...", bg='#F0F8FF', font=('Arial', 12)).grid(row=rows+2, column=0)
+
+        ttk.Button(preview_window, text="Resolver", style='Pastel.TButton',
+                   command=lambda: self.start_solve(cost_matrix, supply, demand)).grid(row=2, column=0, columnspan=cols + 3, pady=5)
+
+    def start_solve(self, cost_matrix, supply, demand):
         # Verificar si el problema está balanceado
         total_supply = sum(supply)
         total_demand = sum(demand)
@@ -119,43 +212,85 @@ class MainApplication(tk.Tk):
             messagebox.showerror("Error", "El problema no está balanceado. La oferta total y la demanda total deben ser iguales.")
             return
 
-        method = self.method_var.get()
-        if method.startswith("1.1"):
-            steps = northwest_corner_method(cost_matrix, supply, demand)
-        elif method.startswith("1.2"):
-            steps = vogel_approximation_method(cost_matrix, supply, demand)
-        elif method.startswith("1.3"):
-            steps = minimum_cost_method(cost_matrix, supply, demand)
-        elif method.startswith("1.4"):
-            initial_steps = northwest_corner_method(cost_matrix, supply, demand)
-            initial_allocations = initial_steps[-1]['allocations']
-            optimization_steps = stepping_stone_method(initial_allocations, cost_matrix)
-            steps = initial_steps + optimization_steps
-        elif method.startswith("1.5"):
-            initial_steps = northwest_corner_method(cost_matrix, supply, demand)
-            initial_allocations = initial_steps[-1]['allocations']
-            optimization_steps = modi_method(initial_allocations, cost_matrix)
-            steps = initial_steps + optimization_steps
-        else:
-            messagebox.showerror("Error", "Método no reconocido.")
-            return
+        self.cancel_solver()
+        if self.poll_job is not None:
+            self.after_cancel(self.poll_job)
 
-        self.steps = steps
-        self.current_step = 0
+        # El método se ejecuta en un hilo de trabajo; los pasos llegan por una cola
+        # que se revisa desde el bucle de eventos de Tk.
         self.cost_matrix = cost_matrix
-        self.display_solution()
+        self.steps = StepTrace(len(supply), len(demand))
+        self.current_step = 0
+        self.total_cost = None
+        self.last_allocations = None
+        self.solver_queue = queue.Queue(maxsize=SOLVER_QUEUE_SIZE)
+        self.cancel_event = threading.Event()
+        self.solver_running = True
+        threading.Thread(target=run_solver, daemon=True,
+                         args=(self.method_var.get(), cost_matrix, supply, demand,
+                               self.solver_queue, self.cancel_event,
+                               START_MODES[self.start_combo.current()][1])).start()
+        self.poll_job = self.after(POLL_MS, self.poll_solver)
+
+    def cancel_solver(self):
+        if self.solver_running:
+            self.cancel_event.set()
+
+    def poll_solver(self):
+        self.poll_job = None
+        deadline = time.perf_counter() + POLL_BUDGET_MS / 1000
+        while self.solver_running and time.perf_counter() < deadline:
+            try:
+                kind, payload = self.solver_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == 'step':
+                step, self.total_cost = payload
+                self.steps.append(step)
+                self.last_allocations = step['allocations']
+                if len(self.steps) == 1:
+                    self.display_solution()
+                continue
+
+            self.solver_running = False
+            if kind == 'error':
+                messagebox.showerror("Error", payload)
+            elif not self.steps:
+                messagebox.showerror("Error", "No hay asignaciones que mostrar.")
+            elif kind == 'cancelled':
+                # Se usa el último paso recibido y no self.steps[-1]: indexar la traza
+                # movería la matriz que la tabla está mostrando
+                self.steps.append({'allocations': [row.copy() for row in self.last_allocations],
+                                   'description': "Cálculo cancelado. Se conserva la mejor asignación encontrada."})
+
+        if self.steps and self.solution_window.winfo_exists():
+            self.update_progress()
+        if self.solver_running:
+            self.poll_job = self.after(POLL_MS, self.poll_solver)
+
+    def close_solution_window(self, window):
+        if window is self.solution_window:
+            self.cancel_solver()
+        window.destroy()
 
     def display_solution(self):
         self.solution_window = tk.Toplevel(self)
         self.solution_window.title("Solución")
         self.solution_window.configure(bg='#F0F8FF')
+        self.solution_window.protocol("WM_DELETE_WINDOW",
+                                      lambda window=self.solution_window: self.close_solution_window(window))
 
         self.step_label = tk.Label(self.solution_window, font=('Arial', 12), bg='#F0F8FF')
         self.step_label.pack()
         self.table_frame = tk.Frame(self.solution_window, bg='#F0F8FF')
         self.table_frame.pack()
+        self.table = create_solution_table(self.table_frame, self.cost_matrix, len(self.cost_matrix), len(self.cost_matrix[0]))
+        self.displayed_step = None
         self.description_label = tk.Label(self.solution_window, font=('Arial', 12), bg='#F0F8FF')
         self.description_label.pack()
+        self.progress_label = tk.Label(self.solution_window, font=('Arial', 10), bg='#F0F8FF')
+        self.progress_label.pack()
         navigation_frame = tk.Frame(self.solution_window, bg='#F0F8FF')
         navigation_frame.pack()
 
@@ -166,45 +301,75 @@ class MainApplication(tk.Tk):
         prev_button.grid(row=0, column=0, padx=5, pady=5)
         next_button = ttk.Button(navigation_frame, text="Siguiente", command=self.next_step, style='Pastel.TButton')
         next_button.grid(row=0, column=1, padx=5, pady=5)
+        self.cancel_button = ttk.Button(navigation_frame, text="Cancelar", command=self.cancel_solver, style='Pastel.TButton')
+        self.cancel_button.grid(row=0, column=2, padx=5, pady=5)
 
         self.update_solution_display()
 
     def update_solution_display(self):
-        step = self.steps[self.current_step]
-        allocations = step['allocations']
-
-        for widget in self.table_frame.winfo_children():
-            widget.destroy()
-
-        m = len(allocations)
-        n = len(allocations[0])
-
-        for i in range(m):
-            for j in range(n):
-                value = allocations[i][j]
-                text = f"{value}\n({self.cost_matrix[i][j]})" if value != 0 else f"({self.cost_matrix[i][j]})"
-                label = tk.Label(self.table_frame, text=text, width=8, height=4, borderwidth=1, relief="solid", font=('Arial', 12))
-                label.grid(row=i+1, column=j+1)
-
-        for j in range(n):
-            header = tk.Label(self.table_frame, text=f"D{j+1}", width=8, borderwidth=1, relief="solid", bg="#D6EAF8", font=('Arial', 12))
-            header.grid(row=0, column=j+1)
-        for i in range(m):
-            header = tk.Label(self.table_frame, text=f"S{i+1}", width=8, borderwidth=1, relief="solid", bg="#D6EAF8", font=('Arial', 12))
-            header.grid(row=i+1, column=0)
-
-        self.step_label.config(text=f"Paso {self.current_step + 1} de {len(self.steps)}")
-        self.description_label.config(text=step['description'])
+        allocations = self.steps.allocations_at(self.current_step)
+
+        # Solo se actualizan las celdas que cambiaron desde el paso mostrado
+        cells = None
+        if self.displayed_step is not None:
+            cells = self.steps.changed_cells(self.displayed_step, self.current_step)
+        self.table.update(allocations, cells)
+        self.displayed_step = self.current_step
+
+        self.update_step_label()
+        self.description_label.config(text=self.steps.description(self.current_step))
+
+    def update_step_label(self):
+        text = f"Paso {self.current_step + 1} de {len(self.steps)}"
+        if self.solver_running:
+            text += " (calculando...)"
+        self.step_label.config(text=text)
+
+    def update_progress(self):
+        self.update_step_label()
+        status = "Calculando" if self.solver_running else "Terminado"
+        if self.cancel_event.is_set():
+            status = "Cancelando" if self.solver_running else "Cancelado"
+        self.progress_label.config(text=f"{status}: {len(self.steps)} pasos, Z = {self.total_cost}")
+        self.cancel_button.state(['!disabled'] if self.solver_running else ['disabled'])
 
     def next_step(self):
+        if self.current_step == len(self.steps) - 1 and self.solver_running:
+            return  # El siguiente paso aún se está calculando
         if self.current_step < len(self.steps) - 1:
             self.current_step += 1
             self.update_solution_display()
         else:
-            total_cost = calculate_total_cost(self.steps[-1]['allocations'], self.cost_matrix)
+            total_cost = calculate_total_cost(self.steps.allocations_at(-1), self.cost_matrix)
             messagebox.showinfo("Costo Total", f"El costo total (Z) es: {total_cost}")
 
     def previous_step(self):
         if self.current_step > 0:
             self.current_step -= 1
             self.update_solution_display()
+
+def run_solver(method, cost_matrix, supply, demand, results, cancel_event, start='nwc'):
+    # Se ejecuta en el hilo de trabajo, así que no toca ningún widget de Tk. El
+    # método también recibe cancel_event, así que se detiene aunque esté esperando
+    # al portafolio o a mitad de una pasada de precios.
+    source = SOLVE_CACHE.iter_solve(method, cost_matrix, supply, demand, start=start,
+                                    time_budget=PORTFOLIO_TIME_BUDGET, cancel=cancel_event)
+    try:
+        for step in source:
+            step = ('step', (step, calculate_total_cost(step['allocations'], cost_matrix)))
+            if not put_step(results, step, cancel_event) or cancel_event.is_set():
+                source.close()
+                break
+    except Exception as error:  # Cualquier fallo debe sacar a la interfaz del estado "calculando"
+        results.put(('error', str(error) or type(error).__name__))
+        return
+    results.put(('cancelled' if cancel_event.is_set() else 'done', None))
+
+def put_step(results, step, cancel_event):
+    # Espera a que haya lugar en la cola dejando siempre uno libre para el mensaje
+    # final, que así nunca se bloquea. Devuelve False si se cancela mientras tanto.
+    while results.qsize() >= SOLVER_QUEUE_SIZE - 1:
+        if cancel_event.wait(0.005):
+            return False
+    results.put(step)
+    return True
@@ -0,0 +1,88 @@
+# instance_io.py
+
+import csv
+import json
+import os
+
+try:
+    import numpy as np
+except ImportError:  # Solo hace falta para los archivos .npy
+    np = None
+
+# Formatos admitidos:
+# - .json: {"costs": [[...]], "supply": [...], "demand": [...]}
+# - .csv: tabla de transporte; cada fila de costos termina con la oferta de esa
+#   fila y la última fila contiene la demanda de cada columna.
+# - .npy: solo la matriz de costos (se abre mapeada en memoria); la oferta y la
+#   demanda se leen de archivos aparte (.npy, .json, .csv o .txt).
+INSTANCE_EXTENSIONS = ('.json', '.csv', '.npy')
+
+def load_instance(path, supply_path=None, demand_path=None, mmap=True):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        if not isinstance(data, dict):
+            raise ValueError("El archivo JSON debe ser un objeto con costs, supply y demand.")
+        costs = data.get('costs', data.get('cost_matrix', []))
+        if not isinstance(costs, list) or not all(isinstance(row, list) for row in costs):
+            raise ValueError("Los costos deben ser una lista de filas.")
+        cost_matrix = [[float(c) for c in row] for row in costs]
+        supply = [float(s) for s in json_vector(data['supply'], "La oferta")]
+        demand = [float(d) for d in json_vector(data['demand'], "La demanda")]
+    elif extension == '.csv':
+        cost_matrix, supply, demand = read_tableau(path)
+    elif extension == '.npy':
+        if supply_path is None or demand_path is None:
+            raise ValueError("Para una matriz .npy hay que indicar los archivos de oferta y demanda.")
+        cost_matrix = load_cost_matrix(path, mmap)
+        supply = load_vector(supply_path)
+        demand = load_vector(demand_path)
+    else:
+        raise ValueError(f"Formato de archivo no admitido: {extension or path}")
+
+    if supply_path is not None and extension != '.npy':
+        supply = load_vector(supply_path)
+    if demand_path is not None and extension != '.npy':
+        demand = load_vector(demand_path)
+    check_dimensions(cost_matrix, supply, demand)
+    return cost_matrix, supply, demand
+
+def load_cost_matrix(path, mmap=True):
+    if np is None:
+        raise ValueError("Se necesita NumPy para leer archivos .npy.")
+    cost_matrix = np.load(path, mmap_mode='r' if mmap else None)
+    if cost_matrix.ndim != 2:
+        raise ValueError("La matriz de costos debe tener dos dimensiones.")
+    return cost_matrix
+
+def load_vector(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npy':
+        if np is None:
+            raise ValueError("Se necesita NumPy para leer archivos .npy.")
+        return [float(x) for x in np.load(path).ravel()]
+    with open(path, encoding='utf-8') as file:
+        if extension == '.json':
+            return [float(x) for x in json_vector(json.load(file), "El vector")]
+        return [float(x) for line in file for x in line.replace(',', ' ').split()]
+
+def json_vector(value, name):
+    if not isinstance(value, list):
+        raise ValueError(f"{name} debe ser una lista de números.")
+    return value
+
+def read_tableau(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        rows = [[cell.strip() for cell in row] for row in csv.reader(file) if any(cell.strip() for cell in row)]
+    if len(rows) < 2:
+        raise ValueError("La tabla debe tener al menos una fila de costos y la fila de demanda.")
+    cost_matrix = [[float(c) for c in row[:-1]] for row in rows[:-1]]
+    supply = [float(row[-1]) for row in rows[:-1]]
+    demand = [float(d) for d in rows[-1] if d != '']
+    return cost_matrix, supply, demand
+
+def check_dimensions(cost_matrix, supply, demand):
+    m, n = len(supply), len(demand)
+    if m == 0 or n == 0 or len(cost_matrix) != m or any(len(row) != n for row in cost_matrix):
+        raise ValueError("Las dimensiones de la matriz de costos no coinciden con la oferta y la demanda.")
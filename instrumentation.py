@@ -0,0 +1,35 @@
+# instrumentation.py
+
+import time
+
+class SolverStats:
+    # Contadores opcionales de los métodos de optimización. Se pasan como
+    # instrumentation=SolverStats(...); si no se pasan, los métodos no miden nada.
+    # callback(iteration, total_cost, entering_cell) se llama después de cada pivote.
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.pivots = 0
+        self.loop_searches = 0
+        self.loop_nodes = 0
+        self.potential_updates = 0
+        self.phase_seconds = {}
+
+    def start(self):
+        return time.perf_counter()
+
+    def stop(self, phase, started):
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + time.perf_counter() - started
+
+    def iteration(self, total_cost, entering_cell):
+        self.pivots += 1
+        if self.callback is not None:
+            self.callback(self.pivots, total_cost, entering_cell)
+
+    def as_dict(self):
+        return {
+            'pivots': self.pivots,
+            'loop_searches': self.loop_searches,
+            'loop_nodes': self.loop_nodes,
+            'potential_updates': self.potential_updates,
+            'phase_seconds': dict(self.phase_seconds),
+        }
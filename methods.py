@@ -1,8 +1,31 @@
 # methods.py
 
-def northwest_corner_method(cost_matrix, supply, demand):
-    steps = []
+import heapq
+import math
+import time
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional; sin él se usa la ruta en Python puro
+    np = None
+
+# A partir de este número de celdas se ordena con NumPy si está disponible
+NUMPY_MIN_CELLS = 10000
+# En el flujo de costo mínimo cada paso de Dijkstra es una operación de NumPy, que
+# solo compensa su costo fijo con filas largas
+NUMPY_MIN_FLOW_CELLS = 40000
+
+def row_items(row):
+    # Pares (columna, valor) de una fila densa (lista) o dispersa (diccionario
+    # columna -> valor con solo las rutas permitidas, ver sparse.py)
+    return row.items() if isinstance(row, dict) else enumerate(row)
+
+def northwest_corner_method(cost_matrix, supply, demand, final_only=False):
+    return list(iter_northwest_corner_method(cost_matrix, supply, demand, final_only))
+
+def iter_northwest_corner_method(cost_matrix, supply, demand, final_only=False):
     allocations = [[0 for _ in demand] for _ in supply]
+    description = None
     i, j = 0, 0
     supply_copy = supply.copy()
     demand_copy = demand.copy()
@@ -13,8 +36,9 @@ def northwest_corner_method(cost_matrix, supply, demand):
         description = f"Asignar {allocation} unidades a la celda ({i+1},{j+1})"
         supply_copy[i] -= allocation
         demand_copy[j] -= allocation
-        steps.append({'allocations': [row.copy() for row in allocations],
-                      'description': description})
+        if not final_only:
+            yield {'allocations': [row.copy() for row in allocations],
+                   'description': description}
 
         if supply_copy[i] == 0 and i + 1 < len(supply):
             i += 1
@@ -26,194 +50,484 @@ def northwest_corner_method(cost_matrix, supply, demand):
         else:
             break  # No se pueden hacer más asignaciones
 
-    return steps
+    if final_only and description is not None:
+        yield {'allocations': allocations, 'description': description}
+
+def vogel_approximation_method(cost_matrix, supply, demand, final_only=False):
+    return list(iter_vogel_approximation_method(cost_matrix, supply, demand, final_only))
 
-def vogel_approximation_method(cost_matrix, supply, demand):
-    steps = []
+def iter_vogel_approximation_method(cost_matrix, supply, demand, final_only=False):
     allocations = [[0 for _ in demand] for _ in supply]
-    supply_copy = supply.copy()
-    demand_copy = demand.copy()
+    description = None
+    row_orders, col_orders = sorted_line_orders(cost_matrix, len(supply), len(demand))
 
-    while sum(supply_copy) > 0 and sum(demand_copy) > 0:
-        row_penalties = []
-        for i in range(len(supply)):
-            if supply_copy[i] == 0:
-                row_penalties.append(None)
-                continue
-            costs = [cost_matrix[i][j] for j in range(len(demand)) if demand_copy[j] > 0]
-            if len(costs) >= 2:
-                sorted_costs = sorted(costs)
-                penalty = sorted_costs[1] - sorted_costs[0]
-            elif len(costs) == 1:
-                penalty = costs[0]
-            else:
-                penalty = None
-            row_penalties.append(penalty)
+    for i, j, allocation in vogel_allocations(cost_matrix, supply, demand, row_orders, col_orders):
+        allocations[i][j] = allocation
+        description = f"Asignar {allocation} unidades a la celda ({i+1},{j+1})"
+        if not final_only:
+            yield {'allocations': [row.copy() for row in allocations],
+                   'description': description}
 
-        col_penalties = []
-        for j in range(len(demand)):
-            if demand_copy[j] == 0:
-                col_penalties.append(None)
-                continue
-            costs = [cost_matrix[i][j] for i in range(len(supply)) if supply_copy[i] > 0]
-            if len(costs) >= 2:
-                sorted_costs = sorted(costs)
-                penalty = sorted_costs[1] - sorted_costs[0]
-            elif len(costs) == 1:
-                penalty = costs[0]
-            else:
-                penalty = None
-            col_penalties.append(penalty)
+    if final_only and description is not None:
+        yield {'allocations': allocations, 'description': description}
 
-        valid_row_penalties = [p for p in row_penalties if p is not None]
-        valid_col_penalties = [p for p in col_penalties if p is not None]
+def sorted_line_orders(cost_matrix, m, n):
+    # Orden de las columnas de cada fila y de las filas de cada columna por (costo, índice)
+    if np is not None and m * n >= NUMPY_MIN_CELLS:
+        costs = np.asarray(cost_matrix, dtype=float)
+        row_orders = np.argsort(costs, axis=1, kind='stable').tolist()
+        col_orders = np.argsort(costs, axis=0, kind='stable').T.tolist()
+    else:
+        row_orders = [sorted(range(n), key=cost_matrix[i].__getitem__) for i in range(m)]
+        col_orders = [sorted(range(m), key=lambda i: cost_matrix[i][j]) for j in range(n)]
+    return row_orders, col_orders
 
-        if not valid_row_penalties and not valid_col_penalties:
-            break  # No se pueden hacer más asignaciones
+def vogel_allocations(cost_matrix, supply, demand, row_orders, col_orders):
+    # Genera las asignaciones (i, j, cantidad) de Vogel manteniendo, para cada
+    # línea, los dos menores costos vivos en lugar de recalcularlos en cada paso.
+    m, n = len(supply), len(demand)
+    supply_copy = list(supply)
+    demand_copy = list(demand)
+    row_live = [s > 0 for s in supply_copy]
+    col_live = [d > 0 for d in demand_copy]
+    live_rows = sum(row_live)
+    live_cols = sum(col_live)
+
+    # first/second: posiciones en el orden de la línea de los dos menores costos vivos.
+    # Todo lo que está entre ambas posiciones ya está agotado, así que solo avanzan.
+    row_first, row_second = [0] * m, [0] * m
+    col_first, col_second = [0] * n, [0] * n
+    row_penalties, col_penalties = [None] * m, [None] * n
+    # watchers[k]: líneas cuyos dos menores costos vivos usan la línea cruzada k
+    row_watchers = [set() for _ in range(m)]
+    col_watchers = [set() for _ in range(n)]
+    row_heap, col_heap = [], []
+
+    def advance(order, live, pos):
+        while pos < len(order) and not live[order[pos]]:
+            pos += 1
+        return pos
 
-        if valid_row_penalties:
-            max_row_penalty = max(valid_row_penalties)
+    def update_row(i):
+        order = row_orders[i]
+        for k in (row_first[i], row_second[i]):
+            if k < len(order):
+                col_watchers[order[k]].discard(i)
+        p1 = advance(order, col_live, row_first[i])
+        p2 = advance(order, col_live, max(row_second[i], p1 + 1))
+        row_first[i], row_second[i] = p1, p2
+        if p2 < len(order):
+            penalty = cost_matrix[i][order[p2]] - cost_matrix[i][order[p1]]
+            col_watchers[order[p1]].add(i)
+            col_watchers[order[p2]].add(i)
+        elif p1 < len(order):
+            penalty = cost_matrix[i][order[p1]]
+            col_watchers[order[p1]].add(i)
         else:
-            max_row_penalty = None
+            penalty = None
+        row_penalties[i] = penalty
+        if penalty is not None:
+            heapq.heappush(row_heap, (-penalty, i))
 
-        if valid_col_penalties:
-            max_col_penalty = max(valid_col_penalties)
+    def update_col(j):
+        order = col_orders[j]
+        for k in (col_first[j], col_second[j]):
+            if k < len(order):
+                row_watchers[order[k]].discard(j)
+        p1 = advance(order, row_live, col_first[j])
+        p2 = advance(order, row_live, max(col_second[j], p1 + 1))
+        col_first[j], col_second[j] = p1, p2
+        if p2 < len(order):
+            penalty = cost_matrix[order[p2]][j] - cost_matrix[order[p1]][j]
+            row_watchers[order[p1]].add(j)
+            row_watchers[order[p2]].add(j)
+        elif p1 < len(order):
+            penalty = cost_matrix[order[p1]][j]
+            row_watchers[order[p1]].add(j)
         else:
-            max_col_penalty = None
+            penalty = None
+        col_penalties[j] = penalty
+        if penalty is not None:
+            heapq.heappush(col_heap, (-penalty, j))
+
+    def top(heap, live, penalties):
+        # Descarta entradas obsoletas; el tope es la mayor penalización con el menor índice
+        while heap:
+            neg_penalty, k = heap[0]
+            if live[k] and penalties[k] == -neg_penalty:
+                return -neg_penalty, k
+            heapq.heappop(heap)
+        return None, None
+
+    for i in range(m):
+        if row_live[i]:
+            update_row(i)
+    for j in range(n):
+        if col_live[j]:
+            update_col(j)
+
+    while live_rows > 0 and live_cols > 0:
+        max_row_penalty, i = top(row_heap, row_live, row_penalties)
+        max_col_penalty, j = top(col_heap, col_live, col_penalties)
 
         if max_row_penalty is None and max_col_penalty is None:
             break  # No se pueden hacer más asignaciones
 
-        if (max_row_penalty or 0) >= (max_col_penalty or 0):
-            i_candidates = [idx for idx, p in enumerate(row_penalties) if p == max_row_penalty]
-            i = i_candidates[0]
-            costs = [(cost_matrix[i][j], j) for j in range(len(demand)) if demand_copy[j] > 0]
-            if not costs:
-                row_penalties[i] = None
-                continue
-            min_cost, min_j = min(costs)
-            allocation = min(supply_copy[i], demand_copy[min_j])
-            allocations[i][min_j] = allocation
-            description = f"Asignar {allocation} unidades a la celda ({i+1},{min_j+1})"
-            supply_copy[i] -= allocation
-            demand_copy[min_j] -= allocation
-            steps.append({'allocations': [row.copy() for row in allocations],
-                          'description': description})
+        if max_row_penalty is not None and (max_row_penalty or 0) >= (max_col_penalty or 0):
+            j = row_orders[i][row_first[i]]
         else:
-            j_candidates = [idx for idx, p in enumerate(col_penalties) if p == max_col_penalty]
-            j = j_candidates[0]
-            costs = [(cost_matrix[i][j], i) for i in range(len(supply)) if supply_copy[i] > 0]
-            if not costs:
-                col_penalties[j] = None
-                continue
-            min_cost, min_i = min(costs)
-            allocation = min(supply_copy[min_i], demand_copy[j])
-            allocations[min_i][j] = allocation
-            description = f"Asignar {allocation} unidades a la celda ({min_i+1},{j+1})"
-            supply_copy[min_i] -= allocation
+            i = col_orders[j][col_first[j]]
+
+        allocation = min(supply_copy[i], demand_copy[j])
+        supply_copy[i] -= allocation
+        demand_copy[j] -= allocation
+        yield i, j, allocation
+
+        if not supply_copy[i] > 0:
+            row_live[i] = False
+            live_rows -= 1
+            for col in list(row_watchers[i]):
+                if col_live[col]:
+                    update_col(col)
+        if not demand_copy[j] > 0:
+            col_live[j] = False
+            live_cols -= 1
+            for row in list(col_watchers[j]):
+                if row_live[row]:
+                    update_row(row)
+
+def minimum_cost_method(cost_matrix, supply, demand, final_only=False):
+    return list(iter_minimum_cost_method(cost_matrix, supply, demand, final_only))
+
+def iter_minimum_cost_method(cost_matrix, supply, demand, final_only=False):
+    allocations = [[0 for _ in demand] for _ in supply]
+    description = None
+    cell_order = sorted_cell_order(cost_matrix, len(supply), len(demand))
+
+    for i, j, allocation in minimum_cost_allocations(supply, demand, cell_order):
+        allocations[i][j] = allocation
+        description = f"Asignar {allocation} unidades a la celda ({i+1},{j+1}) con costo {cost_matrix[i][j]}"
+        if not final_only:
+            yield {'allocations': [row.copy() for row in allocations],
+                   'description': description}
+
+    if final_only and description is not None:
+        yield {'allocations': allocations, 'description': description}
+
+def sorted_cell_order(cost_matrix, m, n):
+    # Índices planos (i * n + j) de todas las celdas ordenados por (costo, i, j)
+    if np is not None and m * n >= NUMPY_MIN_CELLS:
+        costs = np.asarray(cost_matrix, dtype=float).ravel()
+        return np.argsort(costs, kind='stable')
+    return sorted(range(m * n), key=lambda k: cost_matrix[k // n][k % n])
+
+def minimum_cost_allocations(supply, demand, cell_order):
+    # Recorre una sola vez el orden de celdas saltando filas y columnas agotadas
+    n = len(demand)
+    supply_copy = list(supply)
+    demand_copy = list(demand)
+    live_rows = sum(1 for s in supply_copy if s > 0)
+    live_cols = sum(1 for d in demand_copy if d > 0)
+
+    for k in cell_order:
+        if live_rows == 0 or live_cols == 0:
+            break  # No se pueden hacer más asignaciones
+        i, j = divmod(int(k), n)
+        if supply_copy[i] > 0 and demand_copy[j] > 0:
+            allocation = min(supply_copy[i], demand_copy[j])
+            supply_copy[i] -= allocation
             demand_copy[j] -= allocation
-            steps.append({'allocations': [row.copy() for row in allocations],
-                          'description': description})
+            yield i, j, allocation
+            if not supply_copy[i] > 0:
+                live_rows -= 1
+            if not demand_copy[j] > 0:
+                live_cols -= 1
 
-    return steps
+def russell_approximation_method(cost_matrix, supply, demand, final_only=False):
+    return list(iter_russell_approximation_method(cost_matrix, supply, demand, final_only))
 
-def minimum_cost_method(cost_matrix, supply, demand):
-    steps = []
+def iter_russell_approximation_method(cost_matrix, supply, demand, final_only=False):
     allocations = [[0 for _ in demand] for _ in supply]
-    supply_copy = supply.copy()
-    demand_copy = demand.copy()
+    description = None
+    row_orders, col_orders = sorted_line_orders(cost_matrix, len(supply), len(demand))
+
+    for i, j, allocation in russell_allocations(cost_matrix, supply, demand, row_orders, col_orders):
+        allocations[i][j] = allocation
+        description = f"Asignar {allocation} unidades a la celda ({i+1},{j+1})"
+        if not final_only:
+            yield {'allocations': [row.copy() for row in allocations],
+                   'description': description}
 
-    cost_positions = []
-    for i in range(len(supply)):
-        for j in range(len(demand)):
-            cost_positions.append((cost_matrix[i][j], i, j))
-
-    cost_positions.sort()
-    allocation_made = True
-
-    while allocation_made:
-        allocation_made = False
-        for cost, i, j in cost_positions:
-            if supply_copy[i] > 0 and demand_copy[j] > 0:
-                allocation = min(supply_copy[i], demand_copy[j])
-                allocations[i][j] = allocation
-                description = f"Asignar {allocation} unidades a la celda ({i+1},{j+1}) con costo {cost}"
-                supply_copy[i] -= allocation
-                demand_copy[j] -= allocation
-                steps.append({'allocations': [row.copy() for row in allocations],
-                              'description': description})
-                allocation_made = True
-                break  # Reiniciar el bucle para volver a verificar las posiciones de costo
-        cost_positions = [cp for cp in cost_positions if supply_copy[cp[1]] > 0 and demand_copy[cp[2]] > 0]
-
-    return steps
-
-def stepping_stone_method(allocations, cost_matrix):
-    steps = []
+    if final_only and description is not None:
+        yield {'allocations': allocations, 'description': description}
+
+def russell_allocations(cost_matrix, supply, demand, row_orders, col_orders):
+    # Russell: u[i] y v[j] son el mayor costo vivo de cada fila y columna y se
+    # asigna a la celda viva con menor c[i][j] - u[i] - v[j] (la primera por filas).
+    # Los mayores costos se siguen con punteros desde el final de cada orden.
+    supply_copy = list(supply)
+    demand_copy = list(demand)
+    live_rows = [i for i in range(len(supply)) if supply_copy[i] > 0]
+    live_cols = [j for j in range(len(demand)) if demand_copy[j] > 0]
+    row_live = [s > 0 for s in supply_copy]
+    col_live = [d > 0 for d in demand_copy]
+    row_top = [len(order) - 1 for order in row_orders]
+    col_top = [len(order) - 1 for order in col_orders]
+
+    while live_rows and live_cols:
+        u = {}
+        for i in live_rows:
+            order = row_orders[i]
+            while not col_live[order[row_top[i]]]:
+                row_top[i] -= 1
+            u[i] = cost_matrix[i][order[row_top[i]]]
+        v = {}
+        for j in live_cols:
+            order = col_orders[j]
+            while not row_live[order[col_top[j]]]:
+                col_top[j] -= 1
+            v[j] = cost_matrix[order[col_top[j]]][j]
+
+        best = None
+        for i in live_rows:
+            row = cost_matrix[i]
+            u_i = u[i]
+            for j in live_cols:
+                delta = row[j] - u_i - v[j]
+                if best is None or delta < best[0]:
+                    best = (delta, i, j)
+        _, i, j = best
+
+        allocation = min(supply_copy[i], demand_copy[j])
+        supply_copy[i] -= allocation
+        demand_copy[j] -= allocation
+        yield i, j, allocation
+
+        if not supply_copy[i] > 0:
+            row_live[i] = False
+            live_rows.remove(i)
+        if not demand_copy[j] > 0:
+            col_live[j] = False
+            live_cols.remove(j)
+
+# Reglas para elegir la celda entrante en el Método del Paso Secuencial:
+# 'dantzig' evalúa todas las celdas, 'first' toma la primera que mejora,
+# 'partial' evalúa por bloques y 'candidate' reutiliza una lista de candidatas.
+PRICING_RULES = ('dantzig', 'first', 'partial', 'candidate')
+
+def stepping_stone_method(allocations, cost_matrix, pricing='dantzig', block_size=None,
+                          candidate_list_size=None, stats=None, final_only=False, instrumentation=None,
+                          max_iterations=None, time_limit=None, cancel=None):
+    return list(iter_stepping_stone_method(allocations, cost_matrix, pricing, block_size,
+                                           candidate_list_size, stats, final_only, instrumentation,
+                                           max_iterations, time_limit, cancel))
+
+def iter_stepping_stone_method(allocations, cost_matrix, pricing='dantzig', block_size=None,
+                               candidate_list_size=None, stats=None, final_only=False, instrumentation=None,
+                               max_iterations=None, time_limit=None, cancel=None):
+    # max_iterations y time_limit (segundos) limitan los pivotes; al agotarse se
+    # devuelve la solución actual (la mejor hasta ahora) con su brecha de optimalidad.
+    # cancel (p. ej. un threading.Event) detiene el cálculo igual en cuanto se activa.
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    if pricing not in PRICING_RULES:
+        raise ValueError(f"Regla de selección no reconocida: {pricing}")
+
+    allocations = [row.copy() for row in allocations]
+    m, n = len(allocations), len(allocations[0])
+    # Celdas básicas, incluidas las de valor cero de una solución degenerada: las
+    # rutas se buscan sobre ellas, así que siempre existe la de cada celda no básica
+    basis = BasisTree(allocations, cost_matrix).cells
+    row_cols, col_rows = lines = basis_lines(basis, m, n)
+    num_cells = m * n
+    block_size = block_size or n
+    candidate_list_size = candidate_list_size or max(m, n)
     total_cost = calculate_total_cost(allocations, cost_matrix)
-    steps.append({'allocations': [row.copy() for row in allocations],
-                  'description': f"Costo total inicial: {total_cost}"})
+    if not final_only:
+        yield {'allocations': [row.copy() for row in allocations],
+               'description': f"Costo total inicial: {total_cost}"}
 
-    while True:
-        potentials = calculate_opportunity_costs(allocations, cost_matrix)
-        max_reduction = 0
-        best_path = None
+    loop_searches = 0
+    pivots = 0
+    next_cell = 0  # Dónde retoman la búsqueda 'first' y 'partial'
+    candidates = []
+    stopped = False
+
+    def evaluate(k):
+        # Costo de oportunidad y ruta de la celda k, o (None, None) si no aplica.
+        # Al pasar deadline o al cancelar deja de buscar rutas, así una pasada de
+        # precios no se come el presupuesto de tiempo ni retrasa la cancelación
+        nonlocal loop_searches, stopped
+        if stopped or budget_exhausted(0, None, deadline, cancel):
+            stopped = True
+            return None, None
+        i, j = divmod(k, n)
+        if (i, j) in basis:
+            return None, None
+        loop_searches += 1
+        if instrumentation is not None:
+            instrumentation.loop_searches += 1
+        path = find_stepping_stone_path(allocations, i, j, instrumentation, basis, lines)
+        if path is None:
+            return None, None
+        return calculate_path_cost(path, cost_matrix), path
+
+    def best_of(cells):
+        best_cost, best_path = 0, None
+        for k in cells:
+            opportunity_cost, path = evaluate(k)
+            if path is not None and opportunity_cost < best_cost:
+                best_cost, best_path = opportunity_cost, path
+        return best_path
 
-        for (i, j), opportunity_cost in potentials.items():
-            if opportunity_cost < max_reduction:
-                max_reduction = opportunity_cost
-                best_cell = (i, j)
-                best_path = find_stepping_stone_path(allocations, i, j)
+    def choose_path():
+        nonlocal next_cell, candidates
+        if pricing == 'dantzig':
+            return best_of(range(num_cells))
 
-        if max_reduction >= 0:
+        if pricing == 'first':
+            for offset in range(num_cells):
+                k = (next_cell + offset) % num_cells
+                opportunity_cost, path = evaluate(k)
+                if path is not None and opportunity_cost < 0:
+                    next_cell = (k + 1) % num_cells
+                    return path
+            return None
+
+        if pricing == 'partial':
+            for offset in range(0, num_cells, block_size):
+                first = (next_cell + offset) % num_cells
+                block = [(first + k) % num_cells for k in range(min(block_size, num_cells))]
+                path = best_of(block)
+                if path is not None:
+                    next_cell = (block[-1] + 1) % num_cells
+                    return path
+            return None
+
+        # 'candidate': se vuelven a evaluar solo las candidatas; cuando ninguna
+        # mejora se reconstruye la lista con una evaluación completa.
+        improving = []
+        for k in candidates:
+            opportunity_cost, path = evaluate(k)
+            if path is not None and opportunity_cost < 0:
+                improving.append((opportunity_cost, k, path))
+        if not improving:
+            for k in range(num_cells):
+                opportunity_cost, path = evaluate(k)
+                if path is not None and opportunity_cost < 0:
+                    improving.append((opportunity_cost, k, path))
+            improving.sort(key=lambda item: item[:2])
+            improving = improving[:candidate_list_size]
+        if not improving:
+            return None
+        best = min(improving, key=lambda item: item[:2])
+        candidates = [k for _, k, _ in improving if k != best[1]]
+        return best[2]
+
+    optimal = True
+    while True:
+        if budget_exhausted(pivots, max_iterations, deadline, cancel):
+            optimal = False
+            break
+        if instrumentation is not None:
+            started = instrumentation.start()
+        best_path = choose_path()
+        if instrumentation is not None:
+            instrumentation.stop('pricing', started)
+        if stopped:
+            optimal = False  # La pasada quedó incompleta: no prueba nada
+            break
+        if best_path is None:
             break  # La solución es óptima
 
+        if instrumentation is not None:
+            started = instrumentation.start()
+        theta = min(allocations[i][j] for i, j in best_path[1::2])
+        leaving = next(cell for cell in best_path[1::2] if allocations[cell[0]][cell[1]] == theta)
         allocations = adjust_allocations(allocations, best_path)
-        total_cost += max_reduction
-        description = f"Se realizó un ajuste, nuevo costo total: {total_cost}"
-        steps.append({'allocations': [row.copy() for row in allocations],
-                      'description': description})
-
-    steps.append({'allocations': [row.copy() for row in allocations],
-                  'description': "Solución óptima encontrada con el Método del Paso Secuencial."})
+        basis.discard(leaving)
+        basis.add(best_path[0])
+        row_cols[leaving[0]].discard(leaving[1])
+        col_rows[leaving[1]].discard(leaving[0])
+        row_cols[best_path[0][0]].add(best_path[0][1])
+        col_rows[best_path[0][1]].add(best_path[0][0])
+        pivots += 1
+        if instrumentation is not None:
+            instrumentation.stop('pivot', started)
+            total_cost = calculate_total_cost(allocations, cost_matrix)
+            instrumentation.iteration(total_cost, best_path[0])
+        if not final_only:
+            total_cost = calculate_total_cost(allocations, cost_matrix)
+            description = f"Se realizó un ajuste, nuevo costo total: {total_cost}"
+            yield {'allocations': [row.copy() for row in allocations],
+                   'description': description}
 
-    return steps
+    if stats is not None:
+        stats['pricing'] = pricing
+        stats['pivots'] = pivots
+        stats['loop_searches'] = loop_searches
+    total_cost = calculate_total_cost(allocations, cost_matrix)
+    if optimal:
+        description = "Solución óptima encontrada con el Método del Paso Secuencial."
+        lower_bound = total_cost
+    else:
+        u, v = calculate_potentials(allocations, cost_matrix, basis)
+        lower_bound = calculate_lower_bound(allocations, cost_matrix, u, v)
+        description = budget_description(pivots, max_iterations, total_cost, lower_bound, cancel)
+    yield {'allocations': allocations if final_only else [row.copy() for row in allocations],
+           'description': description,
+           'lower_bound': lower_bound,
+           'gap': total_cost - lower_bound}
 
-def calculate_opportunity_costs(allocations, cost_matrix):
+def calculate_opportunity_costs(allocations, cost_matrix, basis=None):
     potentials = {}
     for i in range(len(allocations)):
         for j in range(len(allocations[0])):
-            if allocations[i][j] == 0:
-                path = find_stepping_stone_path(allocations, i, j)
+            basic = (i, j) in basis if basis is not None else allocations[i][j] != 0
+            if not basic:
+                path = find_stepping_stone_path(allocations, i, j, basis=basis)
                 if path:
                     opportunity_cost = calculate_path_cost(path, cost_matrix)
                     potentials[(i, j)] = opportunity_cost
     return potentials
 
-def find_stepping_stone_path(allocations, start_i, start_j):
+def find_stepping_stone_path(allocations, start_i, start_j, instrumentation=None, basis=None, lines=None):
+    # Ruta cerrada desde (start_i, start_j) por celdas asignadas (o por las celdas
+    # de basis, si se indica), alternando movimientos por fila y por columna.
+    # La celda inicial no se repite al final. lines: basis_lines(basis) ya calculado.
     m, n = len(allocations), len(allocations[0])
     path = [(start_i, start_j)]
     visited = set()
 
+    if basis is None:
+        def row_stones(i):
+            return [col for col in range(n) if allocations[i][col] > 0]
+
+        def col_stones(j):
+            return [row for row in range(m) if allocations[row][j] > 0]
+    else:
+        row_cols, col_rows = lines or basis_lines(basis, m, n)
+        row_stones = row_cols.__getitem__
+        col_stones = col_rows.__getitem__
+
     def backtrack(i, j, direction):
         if (i, j, direction) in visited:
             return None
         visited.add((i, j, direction))
+        if instrumentation is not None:
+            instrumentation.loop_nodes += 1
         if direction == 'row':
-            for col in range(n):
-                if col != j and allocations[i][col] > 0:
+            for col in row_stones(i):
+                if col != j:
                     next_step = (i, col)
-                    if next_step == (start_i, start_j):
-                        return [next_step]
                     result = backtrack(i, col, 'col')
                     if result is not None:
                         return [next_step] + result
         else:
-            for row in range(m):
-                if row != i and allocations[row][j] > 0:
+            if j == start_j and i != start_i:
+                return []  # Se cierra la ruta en la celda inicial
+            for row in col_stones(j):
+                if row != i:
                     next_step = (row, j)
-                    if next_step == (start_i, start_j):
-                        return [next_step]
                     result = backtrack(row, j, 'row')
                     if result is not None:
                         return [next_step] + result
@@ -225,6 +539,15 @@ def find_stepping_stone_path(allocations, start_i, start_j):
         return path + result
     return None
 
+def basis_lines(basis, m, n):
+    # Celdas básicas de cada fila y de cada columna, para no recorrer las líneas enteras
+    row_cols = [set() for _ in range(m)]
+    col_rows = [set() for _ in range(n)]
+    for i, j in basis:
+        row_cols[i].add(j)
+        col_rows[j].add(i)
+    return row_cols, col_rows
+
 def calculate_path_cost(path, cost_matrix):
     cost = 0
     sign = 1  # Iniciar con signo positivo
@@ -242,48 +565,671 @@ def adjust_allocations(allocations, path):
             allocations[i][j] -= theta
     return allocations
 
-def modi_method(allocations, cost_matrix):
-    steps = []
+# Reglas de pivoteo de MODI. 'dantzig' entra la celda con el menor delta y sale la
+# primera celda que se anula en el ciclo. Las otras dos evitan ciclar en soluciones
+# degeneradas: 'bland' entra y sale siempre la primera celda por filas que cumple,
+# y 'strongly_feasible' (Cunningham) entra como 'dantzig' pero mantiene la base
+# fuertemente factible eligiendo la celda que sale según el recorrido del ciclo.
+PIVOT_RULES = ('dantzig', 'bland', 'strongly_feasible')
+
+def modi_method(allocations, cost_matrix, final_only=False, instrumentation=None, basis=None,
+                pivot_rule='dantzig', max_iterations=None, time_limit=None, cancel=None):
+    return list(iter_modi_method(allocations, cost_matrix, final_only, instrumentation, basis,
+                                 pivot_rule, max_iterations, time_limit, cancel))
+
+def iter_modi_method(allocations, cost_matrix, final_only=False, instrumentation=None, basis=None,
+                     pivot_rule='dantzig', max_iterations=None, time_limit=None, cancel=None):
+    # basis: celdas básicas de una solución anterior para completar una base degenerada.
+    # max_iterations y time_limit (segundos) limitan los pivotes; al agotarse, o al
+    # activarse cancel, se devuelve la mejor solución hasta ahora con una cota
+    # inferior del óptimo.
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    if pivot_rule not in PIVOT_RULES:
+        raise ValueError(f"Regla de pivoteo no reconocida: {pivot_rule}")
+    allocations = [row.copy() for row in allocations]
     total_cost = calculate_total_cost(allocations, cost_matrix)
-    steps.append({'allocations': [row.copy() for row in allocations],
-                  'description': f"Costo total inicial: {total_cost}"})
+    if not final_only:
+        yield {'allocations': [row.copy() for row in allocations],
+               'description': f"Costo total inicial: {total_cost}"}
 
-    while True:
-        u, v = calculate_potentials(allocations, cost_matrix)
-        delta = calculate_delta(allocations, cost_matrix, u, v)
-        min_delta = min([delta[i][j] for i in range(len(delta)) for j in range(len(delta[0])) if delta[i][j] < 0], default=0)
+    if instrumentation is not None:
+        started = instrumentation.start()
+    basis = BasisTree(allocations, cost_matrix, basis, strongly_feasible=pivot_rule == 'strongly_feasible')
+    if pivot_rule == 'strongly_feasible' and not basis.strongly_feasible:
+        pivot_rule = 'bland'  # Sin base de partida fuertemente factible la regla podría ciclar
+    if instrumentation is not None:
+        instrumentation.stop('setup', started)
+        instrumentation.potential_updates += basis.m + basis.n
 
-        if min_delta >= 0:
+    iterations = 0
+    optimal = True
+    while True:
+        if budget_exhausted(iterations, max_iterations, deadline, cancel):
+            optimal = False
+            break
+        if instrumentation is not None:
+            started = instrumentation.start()
+        entering = find_entering_cell(allocations, cost_matrix, basis, first=pivot_rule == 'bland')
+        if instrumentation is not None:
+            instrumentation.stop('pricing', started)
+        if entering is None:
             break  # La solución es óptima
 
-        i_min, j_min = [(i, j) for i in range(len(delta)) for j in range(len(delta[0])) if delta[i][j] == min_delta][0]
-        path = find_loop(allocations, i_min, j_min)
-        allocations = adjust_allocations_modi(allocations, path)
+        if instrumentation is not None:
+            started = instrumentation.start()
+        basis.pivot(allocations, *entering, instrumentation=instrumentation, rule=pivot_rule)
+        iterations += 1
+        if instrumentation is not None:
+            instrumentation.stop('pivot', started)
+            total_cost = calculate_total_cost(allocations, cost_matrix)
+            instrumentation.iteration(total_cost, entering)
+        if not final_only:
+            total_cost = calculate_total_cost(allocations, cost_matrix)
+            description = f"Se realizó un ajuste, nuevo costo total: {total_cost}"
+            yield {'allocations': [row.copy() for row in allocations],
+                   'description': description}
+
+    # La base final se devuelve para poder reoptimizar más tarde desde ella
+    total_cost = calculate_total_cost(allocations, cost_matrix)
+    if optimal:
+        description = "Solución óptima encontrada con el Método MODI."
+        lower_bound = total_cost
+    else:
+        lower_bound = calculate_lower_bound(allocations, cost_matrix, *basis.potentials())
+        description = budget_description(iterations, max_iterations, total_cost, lower_bound, cancel)
+    yield {'allocations': allocations if final_only else [row.copy() for row in allocations],
+           'description': description,
+           'basis': [list(cell) for cell in sorted(basis.cells)],
+           'lower_bound': lower_bound,
+           'gap': total_cost - lower_bound}
+
+def budget_exhausted(iterations, max_iterations, deadline, cancel=None):
+    return ((max_iterations is not None and iterations >= max_iterations)
+            or (deadline is not None and time.perf_counter() >= deadline)
+            or (cancel is not None and cancel.is_set()))
+
+def budget_description(iterations, max_iterations, total_cost, lower_bound, cancel=None):
+    if cancel is not None and cancel.is_set():
+        reason = "Se canceló el cálculo"
+    elif max_iterations is not None and iterations >= max_iterations:
+        reason = f"Se alcanzó el límite de {max_iterations} iteraciones"
+    else:
+        reason = "Se agotó el tiempo"
+    return (f"{reason} sin confirmar la optimalidad. Costo total: {total_cost}, "
+            f"cota inferior: {lower_bound}, brecha: {total_cost - lower_bound}")
+
+def find_entering_cell(allocations, cost_matrix, basis, first=False):
+    # Celda no básica con el menor delta negativo (la primera por filas en caso de
+    # empate); con first, la primera por filas con delta negativo (regla de Bland)
+    m, n = basis.m, basis.n
+    potential = basis.potential
+    min_delta = 0
+    entering = None
+    for i in range(m):
+        cost_row = cost_matrix[i]
+        allocation_row = allocations[i]
+        u_i = potential[i]
+        for j in range(n):
+            if allocation_row[j] == 0 and (i, j) not in basis.cells:
+                delta = cost_row[j] - u_i - potential[m + j]
+                if delta < min_delta:
+                    if first:
+                        return i, j
+                    min_delta = delta
+                    entering = (i, j)
+    return entering
+
+class BasisTree:
+    # Base como árbol generador: los nodos 0..m-1 son las filas y m..m+n-1 las
+    # columnas; cada celda básica (i, j) une la fila i con la columna j. La raíz es
+    # la fila 0 (u[0] = 0). parent/depth/thread siguen la convención del simplex de
+    # redes: thread enlaza los nodos en preorden, así que el subárbol de k son los
+    # nodos que siguen a k en el thread mientras su profundidad sea mayor.
+    def __init__(self, allocations, cost_matrix, preferred_cells=None, n=None, strongly_feasible=False):
+        # Con filas dispersas (diccionarios) hay que indicar el número de columnas n.
+        # strongly_feasible: completar la base de forma que cada celda básica de
+        # valor cero quede con la fila como hija (orientada hacia la raíz)
+        m = len(allocations)
+        n = len(allocations[0]) if n is None else n
+        self.m, self.n = m, n
+        self.cost_matrix = cost_matrix
+        size = m + n
+        self.parent = [-1] * size
+        self.depth = [0] * size
+        self.thread = [0] * size
+        self.rev_thread = [0] * size
+        self.potential = [0] * size
+        self.adjacent = [set() for _ in range(size)]
+        self.cells = set()
+
+        components = list(range(size))
+
+        def find(x):
+            while components[x] != x:
+                components[x] = components[components[x]]
+                x = components[x]
+            return x
+
+        def add_cell(i, j):
+            root_i, root_j = find(i), find(m + j)
+            if root_i == root_j:
+                return False
+            components[root_i] = root_j
+            self.cells.add((i, j))
+            self.adjacent[i].add(m + j)
+            self.adjacent[m + j].add(i)
+            return True
+
+        for i in range(m):
+            for j, allocation in row_items(allocations[i]):
+                if allocation > 0 and not add_cell(i, j):
+                    raise ValueError("La solución inicial no es básica: las celdas asignadas forman un ciclo.")
+
+        # Solución degenerada: se completa el árbol con celdas básicas de valor cero,
+        # empezando por las de una base anterior si se indicó alguna. Para una base
+        # fuertemente factible, cada parte suelta se cuelga por una de sus filas de
+        # una columna ya unida a la raíz; eso requiere que la raíz tenga alguna columna.
+        # Con filas dispersas una fila puede no tener ruta a esas columnas todavía, así
+        # que se repite mientras alguna parte se pueda colgar.
+        if strongly_feasible:
+            preferred_cells = None
+            linked = True
+            while linked:
+                linked = False
+                for i in range(m):
+                    if find(i) != find(0):
+                        j = next((j for j, _ in row_items(allocations[i]) if find(m + j) == find(0)), None)
+                        if j is not None:
+                            add_cell(i, j)
+                            linked = True
+        for i, j in preferred_cells or ():
+            if len(self.cells) == size - 1:
+                break
+            if 0 <= i < m and 0 <= j < n and allocations[i][j] == 0:
+                add_cell(i, j)
+        for i in range(m):
+            if len(self.cells) == size - 1:
+                break
+            for j, allocation in row_items(allocations[i]):
+                if allocation == 0:
+                    add_cell(i, j)
+
+        order = self._preorder(0, -1)
+        self._link(order, order[0])
+        # Una columna sin demanda, o la fila 0 sin oferta, solo se puede unir con
+        # celdas de valor cero en las que la columna es la hija, así que entonces no
+        # hay base fuertemente factible con raíz en la fila 0
+        self.strongly_feasible = strongly_feasible and all(
+            self.parent[i] == m + j for i, j in self.cells
+            if (allocations[i].get(j, 0) if isinstance(allocations[i], dict) else allocations[i][j]) == 0)
+
+    def cell(self, node, other):
+        if node < self.m:
+            return node, other - self.m
+        return other, node - self.m
+
+    def potentials(self):
+        return self.potential[:self.m], self.potential[self.m:]
+
+    def cycle(self, i, j):
+        # Ciclo que cierra la celda (i, j) con la base, alternando +, -, +, ...
+        # Se construye subiendo desde la columna y la fila hasta su ancestro común;
+        # nodes[k] es el nodo hijo de la arista de cells[k + 1].
+        parent, depth = self.parent, self.depth
+        a, b = i, self.m + j
+        path_a, path_b = [], []
+        while a != b:
+            if depth[a] >= depth[b]:
+                path_a.append(a)
+                a = parent[a]
+            else:
+                path_b.append(b)
+                b = parent[b]
+        nodes = path_b + path_a[::-1]
+        cells = [(i, j)] + [self.cell(k, parent[k]) for k in nodes]
+        return cells, nodes, len(path_b)
+
+    def pivot(self, allocations, i, j, instrumentation=None, rule='dantzig'):
+        cells, nodes, column_side = self.cycle(i, j)
+        if instrumentation is not None:
+            instrumentation.loop_searches += 1
+            instrumentation.loop_nodes += len(nodes)
+        theta = min(allocations[r][c] for r, c in cells[1::2])
+        blocking = [k for k in range(1, len(cells), 2) if allocations[cells[k][0]][cells[k][1]] == theta]
+        if rule == 'bland':
+            leaving = min(blocking, key=cells.__getitem__)
+        elif rule == 'strongly_feasible':
+            # Recorriendo el ciclo en el sentido de la celda entrante desde el ancestro
+            # común (fila i, columna j y de vuelta al ancestro) sale la última bloqueante
+            # que se encuentra: las del lado de la columna van después de las de la fila.
+            column_blocking = [k for k in blocking if k <= column_side]
+            leaving = max(column_blocking or blocking)
+        else:
+            leaving = blocking[0]
+
+        for k, (r, c) in enumerate(cells):
+            if k % 2 == 0:
+                allocations[r][c] += theta
+            else:
+                allocations[r][c] -= theta
+
+        # Al quitar la arista que sale, el extremo de la celda entrante que queda
+        # del lado del subárbol cortado pasa a ser su nueva raíz.
+        y = nodes[leaving - 1]
+        if leaving - 1 < column_side:
+            moved = self._reattach(y, self.m + j, i)
+        else:
+            moved = self._reattach(y, i, self.m + j)
+        if instrumentation is not None:
+            instrumentation.potential_updates += moved
+        self.cells.discard(cells[leaving])
+        self.cells.add((i, j))
+        return theta
+
+    def _preorder(self, root, root_parent):
+        # Recorre el subárbol de root fijando parent, depth y potenciales desde root_parent
+        parent, depth, potential = self.parent, self.depth, self.potential
+        cost_matrix = self.cost_matrix
+        parent[root] = root_parent
+        if root_parent < 0:
+            depth[root] = 0
+            potential[root] = 0
+        else:
+            r, c = self.cell(root, root_parent)
+            depth[root] = depth[root_parent] + 1
+            potential[root] = cost_matrix[r][c] - potential[root_parent]
+
+        order = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            for child in self.adjacent[node]:
+                if child != parent[node]:
+                    r, c = self.cell(child, node)
+                    parent[child] = node
+                    depth[child] = depth[node] + 1
+                    potential[child] = cost_matrix[r][c] - potential[node]
+                    stack.append(child)
+        return order
+
+    def _link(self, order, after):
+        # Inserta la secuencia en preorden order en el thread justo después de after
+        thread, rev_thread = self.thread, self.rev_thread
+        following = thread[after] if order[0] != after else order[0]
+        for prev, node in zip(order, order[1:]):
+            thread[prev] = node
+            rev_thread[node] = prev
+        if order[0] != after:
+            thread[after] = order[0]
+            rev_thread[order[0]] = after
+        thread[order[-1]] = following
+        rev_thread[following] = order[-1]
+
+    def _reattach(self, y, new_root, new_parent):
+        # Corta el subárbol de y (arista y-parent[y]) y lo cuelga de new_parent por new_root
+        thread, rev_thread, depth = self.thread, self.rev_thread, self.depth
+        last = y
+        while depth[thread[last]] > depth[y]:
+            last = thread[last]
+        before, after = rev_thread[y], thread[last]
+        thread[before] = after
+        rev_thread[after] = before
+
+        x = self.parent[y]
+        self.adjacent[x].discard(y)
+        self.adjacent[y].discard(x)
+        self.adjacent[new_root].add(new_parent)
+        self.adjacent[new_parent].add(new_root)
+
+        # Solo se recalculan los potenciales y profundidades del subárbol movido
+        order = self._preorder(new_root, new_parent)
+        self._link(order, new_parent)
+        return len(order)
+
+def make_basic(allocations, cost_matrix, n=None):
+    # Elimina los ciclos entre celdas asignadas moviendo unidades por cada ciclo en
+    # el sentido que no aumenta el costo hasta que una de sus celdas queda en cero.
+    # Con filas dispersas (diccionarios) hay que indicar el número de columnas n.
+    m = len(allocations)
+    n = len(allocations[0]) if n is None else n
+    adjacent = [set() for _ in range(m + n)]
+
+    def tree_path(start, goal):
+        previous = {start: None}
+        frontier = [start]
+        while frontier and goal not in previous:
+            next_frontier = []
+            for node in frontier:
+                for other in adjacent[node]:
+                    if other not in previous:
+                        previous[other] = node
+                        next_frontier.append(other)
+            frontier = next_frontier
+        if goal not in previous:
+            return None
+        path = [goal]
+        while path[-1] != start:
+            path.append(previous[path[-1]])
+        return path
+
+    for i in range(m):
+        for j, _ in list(row_items(allocations[i])):
+            if not allocations[i][j] > 0:
+                continue
+            path = tree_path(m + j, i)
+            if path is None:
+                adjacent[i].add(m + j)
+                adjacent[m + j].add(i)
+                continue
+
+            # Ciclo: (i, j) y las celdas del camino de la columna j a la fila i
+            cycle = [(i, j)] + [(a, b - m) if a < m else (b, a - m) for a, b in zip(path, path[1:])]
+            cost = calculate_path_cost(cycle, cost_matrix)
+            plus, minus = (cycle[0::2], cycle[1::2]) if cost <= 0 else (cycle[1::2], cycle[0::2])
+            theta = min(allocations[r][c] for r, c in minus)
+            for r, c in plus:
+                allocations[r][c] += theta
+            for r, c in minus:
+                allocations[r][c] -= theta
+
+            if allocations[i][j] > 0:
+                # Sale del bosque una de las celdas que quedaron en cero
+                r, c = next((r, c) for r, c in minus if allocations[r][c] == 0)
+                adjacent[r].discard(m + c)
+                adjacent[m + c].discard(r)
+                adjacent[i].add(m + j)
+                adjacent[m + j].add(i)
+    return allocations
+
+def repair_allocations(previous_allocations, cost_matrix, supply, demand, cell_order=None):
+    # Ajusta una solución anterior a la nueva oferta y demanda: recorta primero los
+    # envíos más caros de las filas y columnas que se pasan y reparte lo que falta
+    # con el costo mínimo (cell_order: orden de sorted_cell_order ya calculado).
+    m, n = len(supply), len(demand)
+    if len(previous_allocations) != m or any(len(row) != n for row in previous_allocations):
+        raise ValueError("La solución anterior no tiene las dimensiones del problema.")
+    if sum(supply) != sum(demand):
+        raise ValueError("El problema no está balanceado. La oferta total y la demanda total deben ser iguales.")
+    allocations = [list(row) for row in previous_allocations]
+
+    for i in range(m):
+        excess = sum(allocations[i]) - supply[i]
+        for j in sorted(range(n), key=lambda j: -cost_matrix[i][j]):
+            if not excess > 0:
+                break
+            cut = min(allocations[i][j], excess)
+            allocations[i][j] -= cut
+            excess -= cut
+    for j in range(n):
+        excess = sum(allocations[i][j] for i in range(m)) - demand[j]
+        for i in sorted(range(m), key=lambda i: -cost_matrix[i][j]):
+            if not excess > 0:
+                break
+            cut = min(allocations[i][j], excess)
+            allocations[i][j] -= cut
+            excess -= cut
+
+    residual_supply = [max(supply[i] - sum(allocations[i]), 0) for i in range(m)]
+    residual_demand = [max(demand[j] - sum(allocations[i][j] for i in range(m)), 0) for j in range(n)]
+    if cell_order is None:
+        cell_order = sorted_cell_order(cost_matrix, m, n)
+    for i, j, allocation in minimum_cost_allocations(residual_supply, residual_demand, cell_order):
+        allocations[i][j] += allocation
+    return allocations
+
+def reoptimize(previous_allocations, cost_matrix, supply, demand, method='modi', basis=None,
+               final_only=False, instrumentation=None, cell_order=None):
+    return list(iter_reoptimize(previous_allocations, cost_matrix, supply, demand, method, basis,
+                                final_only, instrumentation, cell_order))
+
+def iter_reoptimize(previous_allocations, cost_matrix, supply, demand, method='modi', basis=None,
+                    final_only=False, instrumentation=None, cell_order=None):
+    # Arranque en caliente: parte de la solución (y base) óptima anterior en lugar
+    # de la esquina noroeste, así que con cambios pequeños bastan pocos pivotes.
+    code = method_code(method)
+    if code not in ('1.4', '1.5'):
+        raise ValueError("Solo se puede reoptimizar con el Método del Paso Secuencial o MODI.")
+    allocations = repair_allocations(previous_allocations, cost_matrix, supply, demand, cell_order)
+    make_basic(allocations, cost_matrix)
+    if not final_only:
         total_cost = calculate_total_cost(allocations, cost_matrix)
-        description = f"Se realizó un ajuste, nuevo costo total: {total_cost}"
-        steps.append({'allocations': [row.copy() for row in allocations],
-                      'description': description})
+        yield {'allocations': [row.copy() for row in allocations],
+               'description': f"Solución anterior ajustada a los nuevos datos, costo total: {total_cost}"}
 
-    steps.append({'allocations': [row.copy() for row in allocations],
-                  'description': "Solución óptima encontrada con el Método MODI."})
+    if code == '1.4':
+        yield from iter_stepping_stone_method(allocations, cost_matrix, final_only=final_only,
+                                              instrumentation=instrumentation)
+    else:
+        yield from iter_modi_method(allocations, cost_matrix, final_only, instrumentation, basis)
 
-    return steps
+def min_cost_flow_method(cost_matrix, supply, demand, final_only=False, instrumentation=None):
+    return list(iter_min_cost_flow_method(cost_matrix, supply, demand, final_only, instrumentation))
 
-def calculate_potentials(allocations, cost_matrix):
-    m, n = len(allocations), len(allocations[0])
-    u = [None] * m
+def iter_min_cost_flow_method(cost_matrix, supply, demand, final_only=False, instrumentation=None):
+    # Caminos más cortos sucesivos con potenciales: cada paso envía flujo desde un
+    # proveedor con oferta restante hasta un consumidor con demanda restante por la
+    # ruta más barata de la red residual. No necesita solución inicial.
+    m, n = len(supply), len(demand)
+    dense = m == 0 or not isinstance(cost_matrix[0], dict)
+    allocations = [[0] * n if dense else dict.fromkeys(cost_matrix[i], 0) for i in range(m)]
+    excess = list(supply)
+    deficit = list(demand)
+    flow_rows = [set() for _ in range(n)]  # filas con flujo positivo en cada columna
+    total_cost = 0
+
+    # Potenciales con costo reducido c[i][j] + u[i] - v[j] >= 0 en todas las celdas y
+    # = 0 en las que tienen flujo: v[j] es el menor costo de la columna y u[i] deja en
+    # cero el menor costo reducido de la fila. Las celdas con costo reducido cero se
+    # llenan primero de forma voraz, lo que no rompe esa condición.
     v = [None] * n
-    u[0] = 0  # Fijamos u[0] = 0
-    basic_cells = [(i, j) for i in range(m) for j in range(n) if allocations[i][j] > 0]
+    for i in range(m):
+        for j, cost in row_items(cost_matrix[i]):
+            if v[j] is None or cost < v[j]:
+                v[j] = cost
+    v = [0 if v_j is None else v_j for v_j in v]  # columnas sin rutas
+    u = [-min((cost - v[j] for j, cost in row_items(cost_matrix[i])), default=0) for i in range(m)]
+    for i in range(m):
+        for j, cost in row_items(cost_matrix[i]):
+            if not excess[i] > 0:
+                break
+            if deficit[j] > 0 and cost + u[i] - v[j] <= 0:
+                amount = min(excess[i], deficit[j])
+                allocations[i][j] = amount
+                excess[i] -= amount
+                deficit[j] -= amount
+                total_cost += amount * cost
+                flow_rows[j].add(i)
+                if not final_only:
+                    yield {'allocations': [row.copy() for row in allocations],
+                           'description': f"Asignar {amount} unidades a la celda ({i+1},{j+1}) con costo reducido cero"}
+
+    costs = None
+    if np is not None and dense and m * n >= NUMPY_MIN_FLOW_CELLS:
+        costs = np.asarray(cost_matrix, dtype=float)
+        u = np.array(u, dtype=float)
+        v = np.array(v, dtype=float)
+
+    while any(s > 0 for s in excess):
+        if instrumentation is not None:
+            started = instrumentation.start()
+        if costs is not None:
+            path = shortest_augmenting_path_numpy(costs, excess, deficit, u, v, flow_rows)
+        else:
+            path = shortest_augmenting_path(cost_matrix, excess, deficit, u, v, flow_rows)
+        if instrumentation is not None:
+            instrumentation.stop('shortest_path', started)
+        if path is None:
+            break  # No se pueden hacer más asignaciones
+
+        # path alterna celdas que ganan flujo (índices pares) y celdas que lo pierden
+        source, target = path[-1][0], path[0][1]
+        amount = min(excess[source], deficit[target])
+        for k in range(1, len(path), 2):
+            i, j = path[k]
+            amount = min(amount, allocations[i][j])
+        for k, (i, j) in enumerate(path):
+            if k % 2 == 0:
+                allocations[i][j] += amount
+                total_cost += amount * cost_matrix[i][j]
+                flow_rows[j].add(i)
+            else:
+                allocations[i][j] -= amount
+                total_cost -= amount * cost_matrix[i][j]
+                if not allocations[i][j] > 0:
+                    flow_rows[j].discard(i)
+        excess[source] -= amount
+        deficit[target] -= amount
+
+        if instrumentation is not None:
+            instrumentation.iteration(total_cost, path[0])
+        if not final_only:
+            description = (f"Enviar {amount} unidades de S{source+1} a D{target+1} por la ruta más corta, "
+                           f"nuevo costo total: {total_cost}")
+            yield {'allocations': [row.copy() for row in allocations],
+                   'description': description}
+
+    yield {'allocations': allocations if final_only else [row.copy() for row in allocations],
+           'description': "Solución óptima encontrada con el método de flujo de costo mínimo."}
+
+def shortest_augmenting_path(cost_matrix, excess, deficit, u, v, flow_rows):
+    # Dijkstra con costos reducidos desde todos los proveedores con oferta restante
+    # hasta el primer consumidor con demanda restante. Los arcos son fila -> columna
+    # (las celdas de la fila) y columna -> fila (celdas con flujo, para devolverlo).
+    # Actualiza los potenciales y devuelve la ruta como celdas desde el consumidor
+    # hacia el proveedor, o None si no queda ningún consumidor alcanzable.
+    m, n = len(u), len(v)
+    inf = float('inf')
+    row_dist = [inf] * m
+    col_dist = [inf] * n
+    row_done = [False] * m
+    col_done = [False] * n
+    row_parent = [None] * m  # columna desde la que se llegó a cada fila
+    col_parent = [None] * n  # fila desde la que se llegó a cada columna
+    heap = []
+    for i in range(m):
+        if excess[i] > 0:
+            row_dist[i] = 0
+            heap.append((0, 0, i))
+    heapq.heapify(heap)
+
+    target = None
+    while heap:
+        dist, is_col, k = heapq.heappop(heap)
+        if is_col:
+            if col_done[k] or dist > col_dist[k]:
+                continue
+            col_done[k] = True
+            if deficit[k] > 0:
+                target = k
+                break
+            for i in flow_rows[k]:
+                if not row_done[i]:
+                    new_dist = dist - cost_matrix[i][k] - u[i] + v[k]
+                    if new_dist < row_dist[i]:
+                        row_dist[i] = new_dist
+                        row_parent[i] = k
+                        heapq.heappush(heap, (new_dist, 0, i))
+        else:
+            if row_done[k] or dist > row_dist[k]:
+                continue
+            row_done[k] = True
+            base = dist + u[k]
+            for j, cost in row_items(cost_matrix[k]):
+                if not col_done[j]:
+                    new_dist = base + cost - v[j]
+                    if new_dist < col_dist[j]:
+                        col_dist[j] = new_dist
+                        col_parent[j] = k
+                        heapq.heappush(heap, (new_dist, 1, j))
+
+    if target is None:
+        return None
+
+    # Los nodos sin etiqueta definitiva están a distancia >= la del consumidor alcanzado
+    limit = col_dist[target]
+    for i in range(m):
+        u[i] += min(row_dist[i], limit)
+    for j in range(n):
+        v[j] += min(col_dist[j], limit)
+
+    path = []
+    j = target
+    while True:
+        i = col_parent[j]
+        path.append((i, j))
+        j = row_parent[i]
+        if j is None:
+            return path
+        path.append((i, j))
 
-    for _ in range(len(basic_cells)):
-        for i, j in basic_cells:
-            if u[i] is not None and v[j] is None:
-                v[j] = cost_matrix[i][j] - u[i]
-            elif u[i] is None and v[j] is not None:
-                u[i] = cost_matrix[i][j] - v[j]
+def shortest_augmenting_path_numpy(costs, excess, deficit, u, v, flow_rows):
+    # Igual que shortest_augmenting_path pero con la versión densa de Dijkstra sobre
+    # arreglos de NumPy: cada fila etiquetada relaja todas las columnas de una vez.
+    m, n = costs.shape
+    inf = np.inf
+    row_key = np.full(m, inf)  # distancia provisional; inf una vez etiquetada
+    col_key = np.full(n, inf)
+    row_dist = np.full(m, inf)
+    col_dist = np.full(n, inf)
+    row_done = np.zeros(m, dtype=bool)
+    col_done = np.zeros(n, dtype=bool)
+    row_parent = [None] * m
+    col_parent = np.zeros(n, dtype=int)
+    for i in range(m):
+        if excess[i] > 0:
+            row_key[i] = row_dist[i] = 0
 
-    return u, v
+    target = None
+    while True:
+        i = int(np.argmin(row_key))
+        j = int(np.argmin(col_key))
+        if row_key[i] == inf and col_key[j] == inf:
+            break
+        if row_key[i] <= col_key[j]:
+            dist = row_key[i]
+            row_key[i] = inf
+            row_done[i] = True
+            candidates = dist + u[i] + costs[i] - v
+            improved = (candidates < col_dist) & ~col_done
+            col_dist[improved] = candidates[improved]
+            col_key[improved] = candidates[improved]
+            col_parent[improved] = i
+        else:
+            dist = col_key[j]
+            col_key[j] = inf
+            col_done[j] = True
+            if deficit[j] > 0:
+                target = j
+                break
+            for r in flow_rows[j]:
+                new_dist = dist - costs[r, j] - u[r] + v[j]
+                if not row_done[r] and new_dist < row_dist[r]:
+                    row_dist[r] = row_key[r] = new_dist
+                    row_parent[r] = j
+
+    if target is None:
+        return None
+
+    limit = col_dist[target]
+    u += np.minimum(row_dist, limit)
+    v += np.minimum(col_dist, limit)
+
+    path = []
+    j = target
+    while True:
+        i = int(col_parent[j])
+        path.append((i, j))
+        j = row_parent[i]
+        if j is None:
+            return path
+        path.append((i, j))
+
+def calculate_potentials(allocations, cost_matrix, basis=None):
+    # u[0] = 0 y u[i] + v[j] = c[i][j] en las celdas básicas. Las celdas asignadas se
+    # completan con celdas básicas de valor cero (las de basis primero) hasta formar
+    # un árbol, así que en una solución degenerada ningún potencial queda en None.
+    return BasisTree(allocations, cost_matrix, basis).potentials()
 
 def calculate_delta(allocations, cost_matrix, u, v):
     m, n = len(allocations), len(allocations[0])
@@ -294,53 +1240,123 @@ def calculate_delta(allocations, cost_matrix, u, v):
                 delta[i][j] = cost_matrix[i][j] - u[i] - v[j]
     return delta
 
-def find_loop(allocations, start_i, start_j):
+def calculate_lower_bound(allocations, cost_matrix, u, v):
+    # Cota inferior del costo óptimo con potenciales cualesquiera (u, v), aunque aún
+    # haya costos reducidos c - u - v negativos. Si se relajan las columnas, cada fila
+    # envía toda su oferta por su celda de menor costo reducido (y lo análogo al
+    # relajar las filas); la cota es Σ u·s + Σ v·d más la mayor de ambas correcciones.
     m, n = len(allocations), len(allocations[0])
-    path = [(start_i, start_j)]
-    visited = set()
-
-    def backtrack(i, j, direction):
-        if (i, j, direction) in visited:
-            return None
-        visited.add((i, j, direction))
-        if direction == 'row':
-            for col in range(n):
-                if col != j and (allocations[i][col] > 0 or (i == start_i and col == start_j)):
-                    next_step = (i, col)
-                    if next_step == (start_i, start_j):
-                        return [next_step]
-                    result = backtrack(i, col, 'col')
-                    if result is not None:
-                        return [next_step] + result
-        else:
-            for row in range(m):
-                if row != i and (allocations[row][j] > 0 or (row == start_i and j == start_j)):
-                    next_step = (row, j)
-                    if next_step == (start_i, start_j):
-                        return [next_step]
-                    result = backtrack(row, j, 'row')
-                    if result is not None:
-                        return [next_step] + result
-        visited.remove((i, j, direction))
-        return None
-
-    result = backtrack(start_i, start_j, 'row')
-    if result:
-        return path + result
-    return None
-
-def adjust_allocations_modi(allocations, path):
-    theta = min([allocations[i][j] for idx, (i, j) in enumerate(path[1:], start=1) if idx % 2 != 0])
-    for idx, (i, j) in enumerate(path):
-        if idx % 2 == 0:
-            allocations[i][j] += theta
-        else:
-            allocations[i][j] -= theta
-    return allocations
+    supply = [sum(row) for row in allocations]
+    demand = [sum(allocations[i][j] for i in range(m)) for j in range(n)]
+    row_min = [math.inf] * m
+    col_min = [math.inf] * n
+    for i in range(m):
+        row = cost_matrix[i]
+        for j in range(n):
+            delta = row[j] - u[i] - v[j]
+            if delta < row_min[i]:
+                row_min[i] = delta
+            if delta < col_min[j]:
+                col_min[j] = delta
+    dual = sum(u[i] * supply[i] for i in range(m)) + sum(v[j] * demand[j] for j in range(n))
+    row_correction = sum(supply[i] * row_min[i] for i in range(m) if supply[i])
+    col_correction = sum(demand[j] * col_min[j] for j in range(n) if demand[j])
+    return dual + max(row_correction, col_correction)
 
 def calculate_total_cost(allocations, cost_matrix):
     total_cost = 0
     for i in range(len(allocations)):
-        for j in range(len(allocations[0])):
-            total_cost += allocations[i][j] * cost_matrix[i][j]
+        for j, allocation in row_items(allocations[i]):
+            total_cost += allocation * cost_matrix[i][j]
     return total_cost
+
+# Códigos del menú de la interfaz y alias para usar los métodos sin interfaz
+METHOD_CODES = {
+    'nwc': '1.1', 'men': '1.1',
+    'vam': '1.2', 'mav': '1.2',
+    'mcm': '1.3', 'lcm': '1.3',
+    'stepping_stone': '1.4',
+    'modi': '1.5', 'dimo': '1.5',
+    'min_cost_flow': '1.6', 'fcm': '1.6',
+}
+
+def method_code(method):
+    # Acepta un alias o cualquier texto que empiece por el código ("1.5 DIMO ...")
+    method = str(method).strip()
+    code = METHOD_CODES.get(method.lower(), method[:3])
+    if code not in METHOD_CODES.values():
+        raise ValueError("Método no reconocido.")
+    return code
+
+# Heurísticas que pueden dar la solución inicial de los métodos de optimización.
+# Con start='portfolio' se ejecutan todas en paralelo y se usa la de menor costo.
+START_METHODS = {
+    'nwc': iter_northwest_corner_method,
+    'vam': iter_vogel_approximation_method,
+    'mcm': iter_minimum_cost_method,
+    'russell': iter_russell_approximation_method,
+}
+START_LABELS = {
+    'nwc': "esquina noroeste",
+    'vam': "aproximación de Vogel",
+    'mcm': "costo mínimo",
+    'russell': "aproximación de Russell",
+}
+
+def solve(method, cost_matrix, supply, demand, final_only=False, start='nwc', time_budget=None,
+          max_iterations=None, time_limit=None, cancel=None):
+    return list(iter_solve(method, cost_matrix, supply, demand, final_only, start, time_budget,
+                           max_iterations, time_limit, cancel))
+
+def iter_solve(method, cost_matrix, supply, demand, final_only=False, start='nwc', time_budget=None,
+               max_iterations=None, time_limit=None, cancel=None):
+    # Genera los pasos del método a medida que se calculan; con final_only solo el último.
+    # start elige la solución inicial de 1.4 y 1.5; time_budget (segundos) limita el portafolio.
+    # max_iterations y time_limit (segundos, contando la solución inicial) ponen un
+    # presupuesto a 1.4 y 1.5: el último paso trae la cota inferior y la brecha.
+    # cancel (p. ej. un threading.Event) los detiene como un presupuesto agotado, y
+    # también la espera del portafolio; si se cancela antes de tener una solución
+    # inicial no se devuelve ningún paso más.
+    began = time.perf_counter()
+    code = method_code(method)
+    if code == '1.1':
+        yield from iter_northwest_corner_method(cost_matrix, supply, demand, final_only)
+        return
+    if code == '1.2':
+        yield from iter_vogel_approximation_method(cost_matrix, supply, demand, final_only)
+        return
+    if code == '1.3':
+        yield from iter_minimum_cost_method(cost_matrix, supply, demand, final_only)
+        return
+    if code == '1.6':
+        yield from iter_min_cost_flow_method(cost_matrix, supply, demand, final_only)
+        return
+
+    if start == 'portfolio':
+        from portfolio import portfolio_start  # portfolio importa este módulo
+        best = portfolio_start(cost_matrix, supply, demand, time_budget, cancel=cancel)
+        if best is None:
+            return  # Cancelado
+        name, initial_allocations, total_cost = best
+        if not final_only:
+            yield {'allocations': [row.copy() for row in initial_allocations],
+                   'description': f"Solución inicial del portafolio: {START_LABELS[name]}, costo total: {total_cost}"}
+    elif start in START_METHODS:
+        # Sin nada que asignar la heurística no da pasos y se parte de la matriz vacía
+        initial_allocations = [[0 for _ in demand] for _ in supply]
+        for initial_step in START_METHODS[start](cost_matrix, supply, demand, final_only):
+            if not final_only:
+                yield initial_step
+            initial_allocations = initial_step['allocations']
+    else:
+        raise ValueError("Solución inicial no reconocida.")
+
+    if time_limit is not None:
+        time_limit = max(time_limit - (time.perf_counter() - began), 0)
+    if code == '1.4':
+        yield from iter_stepping_stone_method(initial_allocations, cost_matrix, final_only=final_only,
+                                              max_iterations=max_iterations, time_limit=time_limit,
+                                              cancel=cancel)
+    else:
+        yield from iter_modi_method(initial_allocations, cost_matrix, final_only,
+                                    max_iterations=max_iterations, time_limit=time_limit, cancel=cancel)
@@ -0,0 +1,98 @@
+# portfolio.py
+
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from methods import START_METHODS, calculate_total_cost
+
+# Tolerancia relativa al total enviado al comprobar que una solución inicial respeta
+# la oferta y la demanda, como en sparse.py: con cantidades decimales grandes las
+# sumas por fila y columna se desvían algo más que un valor absoluto fijo
+FEASIBILITY_TOLERANCE = 1e-9
+
+# Cada cuánto (segundos) se revisa si se canceló la espera del portafolio
+CANCEL_POLL_SECONDS = 0.05
+
+def run_start_method(name, cost_matrix, supply, demand):
+    # Se ejecuta en un proceso de trabajo; solo devuelve la asignación final
+    allocations = [[0 for _ in demand] for _ in supply]
+    for step in START_METHODS[name](cost_matrix, supply, demand, final_only=True):
+        allocations = step['allocations']
+    return allocations
+
+def is_feasible(allocations, supply, demand):
+    tolerance = FEASIBILITY_TOLERANCE * max(1, sum(supply))
+    if any(x < -tolerance for row in allocations for x in row):
+        return False
+    if any(abs(sum(row) - s) > tolerance for row, s in zip(allocations, supply)):
+        return False
+    return all(abs(sum(row[j] for row in allocations) - d) <= tolerance
+               for j, d in enumerate(demand))
+
+def best_start(results, cost_matrix, supply, demand, methods):
+    # La de menor costo entre las factibles; los empates se resuelven por el orden de methods
+    best = None
+    for name in methods:
+        allocations = results.get(name)
+        if allocations is None or not is_feasible(allocations, supply, demand):
+            continue
+        total_cost = calculate_total_cost(allocations, cost_matrix)
+        if best is None or total_cost < best[2]:
+            best = (name, allocations, total_cost)
+    return best
+
+def portfolio_start(cost_matrix, supply, demand, time_budget=None, workers=None, methods=None, cancel=None):
+    # Ejecuta las heurísticas de START_METHODS a la vez en un grupo de procesos y
+    # devuelve (nombre, asignaciones, costo total) de la mejor solución inicial
+    # factible. Con time_budget (segundos) se eligen solo las terminadas a tiempo;
+    # si ninguna lo está, se espera a la primera que termine. Con workers=0 se
+    # ejecutan una tras otra en este proceso. Al activarse cancel (p. ej. un
+    # threading.Event) se deja de esperar: se devuelve la mejor terminada o None.
+    methods = list(methods or START_METHODS)
+    results = {}
+    if workers == 0:
+        began = time.perf_counter()
+        for name in methods:
+            if results and time_budget is not None and time.perf_counter() - began > time_budget:
+                break
+            if cancel is not None and cancel.is_set():
+                break
+            results[name] = run_start_method(name, cost_matrix, supply, demand)
+        best = best_start(results, cost_matrix, supply, demand, methods)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers or len(methods))
+        try:
+            futures = {pool.submit(run_start_method, name, cost_matrix, supply, demand): name
+                       for name in methods}
+            done, pending = wait_or_cancel(futures, time_budget, ALL_COMPLETED, cancel)
+            while True:
+                for future in done:
+                    if future.exception() is None:
+                        results[futures[future]] = future.result()
+                best = best_start(results, cost_matrix, supply, demand, methods)
+                if best is not None or not pending or (cancel is not None and cancel.is_set()):
+                    break
+                done, pending = wait_or_cancel(pending, None, FIRST_COMPLETED, cancel)
+        finally:
+            # Las heurísticas que siguen en marcha terminan solas; no se espera por ellas
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    if best is None:
+        if cancel is not None and cancel.is_set():
+            return None
+        raise ValueError("Ninguna heurística encontró una solución inicial factible.")
+    return best
+
+def wait_or_cancel(futures, timeout, return_when, cancel):
+    # Como concurrent.futures.wait, pero revisa cancel cada CANCEL_POLL_SECONDS
+    if cancel is None:
+        return wait(futures, timeout=timeout, return_when=return_when)
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    while True:
+        remaining = CANCEL_POLL_SECONDS
+        if deadline is not None:
+            remaining = min(remaining, max(deadline - time.perf_counter(), 0))
+        done, pending = wait(futures, timeout=remaining, return_when=return_when)
+        if (not pending or cancel.is_set() or (return_when == FIRST_COMPLETED and done)
+                or (deadline is not None and time.perf_counter() >= deadline)):
+            return done, pending
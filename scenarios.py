@@ -0,0 +1,183 @@
+# scenarios.py
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional; sin él se usa la ruta en Python puro
+    np = None
+
+from methods import (
+    calculate_total_cost,
+    iter_min_cost_flow_method,
+    iter_modi_method,
+    iter_northwest_corner_method,
+    iter_reoptimize,
+    iter_stepping_stone_method,
+    method_code,
+    minimum_cost_allocations,
+    russell_allocations,
+    sorted_cell_order,
+    sorted_line_orders,
+    vogel_allocations
+)
+
+# Con NumPy, el costo mínimo se calcula a la vez para todos los escenarios de un
+# bloque si hay al menos tantos; con menos no compensa el costo fijo por celda
+NUMPY_MIN_SCENARIOS = 8
+# Celdas (escenarios x filas x columnas) de las asignaciones de un bloque
+NUMPY_MAX_BLOCK_CELLS = 2**22
+
+# Métodos aceptados: las heurísticas de solución inicial y los códigos del menú
+SCENARIO_METHODS = {
+    'nwc': 'nwc', '1.1': 'nwc',
+    'vam': 'vam', '1.2': 'vam',
+    'mcm': 'mcm', '1.3': 'mcm',
+    'russell': 'russell',
+    '1.4': 'stepping_stone', '1.5': 'modi', '1.6': 'min_cost_flow',
+}
+
+class ScenarioSolver:
+    # Resuelve muchos escenarios de oferta y demanda sobre la misma matriz de costos.
+    # Lo que solo depende de los costos (orden global de celdas y orden de cada fila
+    # y columna) se calcula una vez, la primera vez que un método lo necesita.
+    def __init__(self, cost_matrix):
+        self.cost_matrix = cost_matrix
+        self.m = len(cost_matrix)
+        self.n = len(cost_matrix[0]) if self.m else 0
+        self._cell_order = None
+        self._line_orders = None
+        self._costs = None
+
+    def cell_order(self):
+        if self._cell_order is None:
+            self._cell_order = sorted_cell_order(self.cost_matrix, self.m, self.n)
+        return self._cell_order
+
+    def line_orders(self):
+        if self._line_orders is None:
+            self._line_orders = sorted_line_orders(self.cost_matrix, self.m, self.n)
+        return self._line_orders
+
+    def costs(self):
+        if self._costs is None:
+            self._costs = np.asarray(self.cost_matrix)
+        return self._costs
+
+    def solve(self, scenarios, method='mcm'):
+        # scenarios: pares (oferta, demanda). Devuelve, en el mismo orden, un diccionario
+        # por escenario con 'allocations' y 'total_cost', o con 'error' si no es válido.
+        name = SCENARIO_METHODS.get(str(method).strip().lower())
+        if name is None:
+            name = SCENARIO_METHODS.get(method_code(method))
+        scenarios = [(list(supply), list(demand)) for supply, demand in scenarios]
+        results = [None] * len(scenarios)
+        valid = []
+        for index, (supply, demand) in enumerate(scenarios):
+            if len(supply) != self.m or len(demand) != self.n:
+                results[index] = {'error': "El escenario no tiene las dimensiones de la matriz de costos."}
+            elif sum(supply) != sum(demand):
+                results[index] = {'error': "El problema no está balanceado. La oferta total y la demanda total deben ser iguales."}
+            else:
+                valid.append(index)
+
+        if name == 'mcm' and np is not None and len(valid) >= NUMPY_MIN_SCENARIOS:
+            block = max(NUMPY_MAX_BLOCK_CELLS // max(self.m * self.n, 1), 1)
+            for start in range(0, len(valid), block):
+                indices = valid[start:start + block]
+                for index, result in zip(indices, self.minimum_cost_block([scenarios[k] for k in indices])):
+                    results[index] = result
+            return results
+
+        previous = None
+        for index in valid:
+            supply, demand = scenarios[index]
+            if name in ('stepping_stone', 'modi'):
+                previous = self.optimize(supply, demand, name, previous)
+                allocations = previous['allocations']
+            elif name == 'min_cost_flow':
+                allocations = final_allocations(iter_min_cost_flow_method(self.cost_matrix, supply, demand,
+                                                                          final_only=True), self.m, self.n)
+            elif name == 'nwc':
+                allocations = final_allocations(iter_northwest_corner_method(self.cost_matrix, supply, demand,
+                                                                             final_only=True), self.m, self.n)
+            else:
+                allocations = self.heuristic(supply, demand, name)
+            results[index] = {'allocations': allocations,
+                              'total_cost': calculate_total_cost(allocations, self.cost_matrix)}
+        return results
+
+    def heuristic(self, supply, demand, name):
+        if name == 'mcm':
+            cells = minimum_cost_allocations(supply, demand, self.cell_order())
+        elif name == 'vam':
+            cells = vogel_allocations(self.cost_matrix, supply, demand, *self.line_orders())
+        else:
+            cells = russell_allocations(self.cost_matrix, supply, demand, *self.line_orders())
+        allocations = [[0 for _ in demand] for _ in supply]
+        for i, j, allocation in cells:
+            allocations[i][j] = allocation
+        return allocations
+
+    def optimize(self, supply, demand, name, previous):
+        # El primer escenario parte del costo mínimo; los demás, de la solución
+        # óptima del anterior ajustada a su oferta y demanda (arranque en caliente)
+        if previous is None:
+            allocations = self.heuristic(supply, demand, 'mcm')
+            if name == 'modi':
+                steps = iter_modi_method(allocations, self.cost_matrix, final_only=True)
+            else:
+                steps = iter_stepping_stone_method(allocations, self.cost_matrix, final_only=True)
+        else:
+            method = '1.4' if name == 'stepping_stone' else '1.5'
+            steps = iter_reoptimize(previous['allocations'], self.cost_matrix, supply, demand, method,
+                                    previous.get('basis'), final_only=True, cell_order=self.cell_order())
+        step = None
+        for step in steps:
+            pass
+        return step
+
+    def minimum_cost_block(self, scenarios):
+        # Costo mínimo de todos los escenarios a la vez: se recorre una sola vez el
+        # orden de celdas y cada celda asigna con una operación sobre los escenarios.
+        # Se saltan las filas y columnas agotadas en todos ellos.
+        m, n = self.m, self.n
+        supplies = np.array([supply for supply, _ in scenarios]).T.copy()  # (m, escenarios)
+        demands = np.array([demand for _, demand in scenarios]).T.copy()  # (n, escenarios)
+        dtype = np.result_type(supplies, demands)
+        supplies = supplies.astype(dtype)
+        demands = demands.astype(dtype)
+        allocations = np.zeros((m, n, len(scenarios)), dtype=dtype)
+        row_dead = [not (supplies[i] > 0).any() for i in range(m)]
+        col_dead = [not (demands[j] > 0).any() for j in range(n)]
+        live_rows = row_dead.count(False)
+        live_cols = col_dead.count(False)
+
+        for k in self.cell_order():
+            if live_rows == 0 or live_cols == 0:
+                break  # No se pueden hacer más asignaciones
+            i, j = divmod(int(k), n)
+            if row_dead[i] or col_dead[j]:
+                continue
+            allocation = np.minimum(supplies[i], demands[j])
+            np.maximum(allocation, 0, out=allocation)
+            allocations[i, j] = allocation
+            supplies[i] -= allocation
+            demands[j] -= allocation
+            if not (supplies[i] > 0).any():
+                row_dead[i] = True
+                live_rows -= 1
+            if not (demands[j] > 0).any():
+                col_dead[j] = True
+                live_cols -= 1
+
+        total_costs = np.einsum('ijk,ij->k', allocations, self.costs()).tolist()
+        allocations = allocations.transpose(2, 0, 1).tolist()
+        return [{'allocations': allocations[s], 'total_cost': total_costs[s]} for s in range(len(scenarios))]
+
+def final_allocations(steps, m, n):
+    allocations = [[0] * n for _ in range(m)]
+    for step in steps:
+        allocations = step['allocations']
+    return allocations
+
+def solve_scenarios(cost_matrix, scenarios, method='mcm'):
+    return ScenarioSolver(cost_matrix).solve(scenarios, method)
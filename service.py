@@ -0,0 +1,345 @@
+# service.py
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Manager
+from urllib.parse import parse_qs, urlparse
+
+from batch import error_message, read_record, record_cache, record_options, solve_record
+from methods import calculate_total_cost, iter_solve, method_code
+
+# Latencias que se conservan (en total y por método) para los percentiles de /metrics
+LATENCY_WINDOW = 1000
+# Segundos de la ventana del rendimiento reciente por método
+THROUGHPUT_WINDOW = 60
+# Pasos en tránsito por solicitud con streaming; si el cliente lee más despacio,
+# el proceso de trabajo espera
+STREAM_BUFFER = 64
+# Tamaño máximo del cuerpo de una solicitud
+MAX_BODY_BYTES = 64 * 2**20
+# Segundos que se espera a un cliente que no lee ni envía nada antes de cortar
+CLIENT_TIMEOUT = 30
+# Segundos que se espera a que todos los procesos de trabajo estén listos al arrancar
+WARM_UP_TIMEOUT = 60
+
+def warm_up(barrier):
+    # Cada proceso de trabajo espera en la barrera, así cada tarea ocupa un proceso
+    # distinto y todos quedan creados y con los módulos ya cargados
+    barrier.wait(WARM_UP_TIMEOUT)
+    return os.getpid()
+
+def stream_record(record, steps, cancel, cache_dir=None):
+    # Se ejecuta en un proceso de trabajo: pone cada paso en la cola steps y termina
+    # con ('done', costo total) o ('error', mensaje). Si el cliente se desconecta
+    # (cancel), deja de calcular.
+    try:
+        cost_matrix, supply, demand = read_record(record)
+        method = record.get('method', '')
+        options = record_options(record)
+        if cache_dir:
+            source = record_cache(cache_dir).iter_solve(method, cost_matrix, supply, demand, **options)
+        else:
+            source = iter_solve(method, cost_matrix, supply, demand, **options)
+        allocations = None
+        for step in source:
+            if not send(steps, cancel, ('step', step)):
+                source.close()
+                return
+            allocations = step['allocations']
+        total_cost = None if allocations is None else calculate_total_cost(allocations, cost_matrix)
+        send(steps, cancel, ('done', total_cost))
+    except Exception as error:  # Cualquier fallo llega al cliente como línea de error
+        send(steps, cancel, ('error', error_message(error)))
+
+def send(steps, cancel, item):
+    while not cancel.is_set():
+        try:
+            steps.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def method_label(record):
+    try:
+        return method_code(record.get('method', ''))
+    except ValueError:
+        return 'desconocido'
+
+def percentiles(values):
+    # Percentiles por rango más cercano, en milisegundos
+    if not values:
+        return {'count': 0, 'p50': None, 'p90': None, 'p99': None}
+    ordered = sorted(values)
+    def rank(p):
+        return ordered[min(max(int(p * len(ordered) + 0.999999) - 1, 0), len(ordered) - 1)] * 1000
+    return {'count': len(ordered), 'p50': rank(0.5), 'p90': rank(0.9), 'p99': rank(0.99)}
+
+class ServiceMetrics:
+    # Solicitudes admitidas y en curso, rechazadas por falta de lugar, latencias y
+    # rendimiento por método. Se usa desde los hilos del servidor.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.in_flight = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.method_latencies = {}
+        self.completed = {}
+        self.errors = {}
+        self.recent = deque()  # (instante, método) de las terminadas en la ventana
+
+    def admit(self, limit):
+        # Cola acotada: si ya hay limit solicitudes admitidas, se rechaza la nueva
+        with self.lock:
+            if self.in_flight >= limit:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def finish(self, method, seconds, ok):
+        now = time.time()
+        with self.lock:
+            self.in_flight -= 1
+            self.latencies.append(seconds)
+            self.method_latencies.setdefault(method, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+            counts = self.completed if ok else self.errors
+            counts[method] = counts.get(method, 0) + 1
+            self.recent.append((now, method))
+            self.expire(now)
+
+    def expire(self, now):
+        while self.recent and self.recent[0][0] < now - THROUGHPUT_WINDOW:
+            self.recent.popleft()
+
+    def snapshot(self, workers, limit):
+        now = time.time()
+        with self.lock:
+            self.expire(now)
+            recent = {}
+            for _, method in self.recent:
+                recent[method] = recent.get(method, 0) + 1
+            methods = sorted(set(self.completed) | set(self.errors))
+            return {
+                'uptime_seconds': now - self.started,
+                'workers': workers,
+                'capacity': limit,
+                'in_flight': self.in_flight,
+                'queue_depth': max(self.in_flight - workers, 0),
+                'rejected': self.rejected,
+                'latency_ms': percentiles(self.latencies),
+                'methods': {method: {
+                    'completed': self.completed.get(method, 0),
+                    'errors': self.errors.get(method, 0),
+                    'per_second': recent.get(method, 0) / THROUGHPUT_WINDOW,
+                    'latency_ms': percentiles(self.method_latencies.get(method, ())),
+                } for method in methods},
+            }
+
+class SolverService:
+    # Servicio HTTP local sobre los métodos de methods.py. Los cálculos se hacen en un
+    # grupo fijo de procesos creado al arrancar; como mucho workers + queue_size
+    # solicitudes se admiten a la vez y el resto recibe 503. Con port=0 el sistema
+    # elige un puerto libre (ver address).
+    def __init__(self, host='127.0.0.1', port=8765, workers=None, queue_size=None, cache_dir=None,
+                 log_requests=False):
+        self.workers = workers or os.cpu_count() or 1
+        self.limit = self.workers + (4 * self.workers if queue_size is None else queue_size)
+        self.cache_dir = cache_dir
+        self.log_requests = log_requests
+        self.metrics = ServiceMetrics()
+        self.manager = Manager()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        barrier = self.manager.Barrier(self.workers)
+        for future in [self.pool.submit(warm_up, barrier) for _ in range(self.workers)]:
+            future.result()
+        self.server = ThreadingHTTPServer((host, port), SolverHandler)
+        self.server.service = self
+        self.thread = None
+
+    @property
+    def address(self):
+        return self.server.server_address[:2]
+
+    def start(self):
+        # Atiende en un hilo aparte (para pruebas o para usarlo desde otro programa)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def close(self):
+        if self.thread is not None:
+            self.server.shutdown()
+            self.thread.join()
+        self.server.server_close()
+        self.pool.shutdown(cancel_futures=True)
+        self.manager.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class SolverHandler(BaseHTTPRequestHandler):
+    # GET /health, GET /metrics y POST /solve con el mismo registro que batch.py
+    # (costs, supply, demand, method y opcionalmente start, max_iterations,
+    # time_limit, id). Con "steps": true la respuesta incluye todos los pasos; con
+    # "stream": true (o ?stream=1) los pasos llegan uno por línea (NDJSON).
+    server_version = 'TransportSolver/1.0'
+    timeout = CLIENT_TIMEOUT
+
+    def do_GET(self):
+        service = self.server.service
+        path = urlparse(self.path).path
+        if path == '/health':
+            self.send_json(200, {'status': 'ok', 'workers': service.workers})
+        elif path == '/metrics':
+            self.send_json(200, service.metrics.snapshot(service.workers, service.limit))
+        else:
+            self.send_json(404, {'error': "Ruta no encontrada."})
+
+    def do_POST(self):
+        service = self.server.service
+        url = urlparse(self.path)
+        if url.path != '/solve':
+            self.send_json(404, {'error': "Ruta no encontrada."})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self.send_json(413, {'error': "La solicitud es demasiado grande."})
+            return
+        try:
+            record = json.loads(self.rfile.read(length) or b'null')
+        except ValueError:
+            self.send_json(400, {'error': "El cuerpo de la solicitud no es JSON válido."})
+            return
+        if not isinstance(record, dict):
+            self.send_json(400, {'error': "La solicitud debe ser un objeto JSON."})
+            return
+
+        if not service.metrics.admit(service.limit):
+            self.send_json(503, {'error': "El servicio está ocupado; vuelva a intentarlo."}, {'Retry-After': '1'})
+            return
+        began = time.perf_counter()
+        ok = False
+        try:
+            stream = record.get('stream') or parse_qs(url.query).get('stream', ['0'])[0] not in ('0', '')
+            if stream:
+                ok = self.stream(record)
+            else:
+                ok = self.solve(record)
+        finally:
+            service.metrics.finish(method_label(record), time.perf_counter() - began, ok)
+
+    def solve(self, record):
+        service = self.server.service
+        try:
+            result = service.pool.submit(solve_record, record, 0, bool(record.get('steps')),
+                                         service.cache_dir).result()
+        except BrokenProcessPool:
+            self.send_json(500, {'error': "Se detuvo un proceso de trabajo."})
+            return False
+        except Exception as error:  # Un fallo inesperado del proceso de trabajo también tiene respuesta
+            self.send_json(500, {'error': error_message(error)})
+            return False
+        self.send_json(400 if 'error' in result else 200, result)
+        return 'error' not in result
+
+    def stream(self, record):
+        # Una vez enviada la cabecera 200, los errores llegan como una línea con "error"
+        service = self.server.service
+        try:
+            method_code(record.get('method', ''))
+        except ValueError as error:
+            self.send_json(400, {'error': str(error)})
+            return False
+        steps = service.manager.Queue(STREAM_BUFFER)
+        cancel = service.manager.Event()
+        future = service.pool.submit(stream_record, record, steps, cancel, service.cache_dir)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        count = 0
+        try:
+            while True:
+                try:
+                    kind, payload = steps.get(timeout=1)
+                except queue.Empty:
+                    if future.done():
+                        # El proceso terminó sin avisar (por ejemplo, se detuvo o falló)
+                        error = future.exception()
+                        message = "Se detuvo un proceso de trabajo."
+                        if error is not None and not isinstance(error, BrokenProcessPool):
+                            message = error_message(error)
+                        self.write_line({'error': message})
+                        return False
+                    continue
+                if kind == 'step':
+                    count += 1
+                    self.write_line(dict(payload, step=count))
+                elif kind == 'done':
+                    self.write_line({'done': True, 'num_steps': count, 'total_cost': payload})
+                    return True
+                else:
+                    self.write_line({'error': payload})
+                    return False
+        except OSError:
+            cancel.set()  # El cliente se fue o dejó de leer; el proceso de trabajo deja de calcular
+            return False
+
+    def write_line(self, data):
+        self.wfile.write(json.dumps(data, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except OSError:
+            pass  # El cliente ya no espera la respuesta
+
+    def log_message(self, format, *args):
+        if self.server.service.log_requests:
+            super().log_message(format, *args)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP local para resolver problemas de transporte.")
+    parser.add_argument('--host', default='127.0.0.1', help="dirección en la que escuchar")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('-w', '--workers', type=int, default=None, help="procesos de trabajo")
+    parser.add_argument('--queue-size', type=int, default=None,
+                        help="solicitudes en espera además de las que se calculan (por defecto 4 por proceso)")
+    parser.add_argument('--cache-dir', help="directorio donde guardar y reutilizar las instancias ya resueltas")
+    args = parser.parse_args(argv)
+
+    service = SolverService(args.host, args.port, args.workers, args.queue_size, args.cache_dir, log_requests=True)
+    host, port = service.address
+    print(f"Servicio escuchando en http://{host}:{port} con {service.workers} procesos de trabajo")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+if __name__ == "__main__":
+    main()
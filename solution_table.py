@@ -0,0 +1,142 @@
+# solution_table.py
+
+import tkinter as tk
+
+# A partir de este número de celdas la tabla se dibuja en un Canvas virtualizado
+CANVAS_MIN_CELLS = 900
+
+CELL_WIDTH = 80
+CELL_HEIGHT = 56
+HEADER_BG = "#D6EAF8"
+FONT = ('Arial', 12)
+MAX_VIEW_WIDTH = 960
+MAX_VIEW_HEIGHT = 600
+
+def cell_text(value, cost):
+    return f"{value}\n({cost})" if value != 0 else f"({cost})"
+
+def create_solution_table(parent, cost_matrix, m, n):
+    if m * n >= CANVAS_MIN_CELLS:
+        return CanvasTable(parent, cost_matrix, m, n)
+    return LabelTable(parent, cost_matrix, m, n)
+
+class LabelTable:
+    # Una etiqueta por celda, creadas una sola vez y actualizadas en su sitio
+    def __init__(self, parent, cost_matrix, m, n):
+        self.cost_matrix = cost_matrix
+        self.labels = []
+        for i in range(m):
+            row_labels = []
+            for j in range(n):
+                label = tk.Label(parent, width=8, height=4, borderwidth=1, relief="solid", font=FONT)
+                label.grid(row=i+1, column=j+1)
+                row_labels.append(label)
+            self.labels.append(row_labels)
+
+        for j in range(n):
+            header = tk.Label(parent, text=f"D{j+1}", width=8, borderwidth=1, relief="solid", bg=HEADER_BG, font=FONT)
+            header.grid(row=0, column=j+1)
+        for i in range(m):
+            header = tk.Label(parent, text=f"S{i+1}", width=8, borderwidth=1, relief="solid", bg=HEADER_BG, font=FONT)
+            header.grid(row=i+1, column=0)
+
+    def update(self, allocations, cells=None):
+        # cells: celdas que cambiaron desde la última actualización (None = todas)
+        if cells is None:
+            cells = ((i, j) for i in range(len(self.labels)) for j in range(len(self.labels[i])))
+        for i, j in cells:
+            self.labels[i][j].config(text=cell_text(allocations[i][j], self.cost_matrix[i][j]))
+
+class CanvasTable:
+    # Tabla sobre un Canvas con barras de desplazamiento que solo mantiene
+    # dibujadas las celdas visibles; los encabezados quedan fijos en los bordes.
+    def __init__(self, parent, cost_matrix, m, n):
+        self.cost_matrix = cost_matrix
+        self.m, self.n = m, n
+        self.allocations = None
+        self.items = {}  # (i, j) -> (rectángulo, texto) de las celdas dibujadas
+
+        width = (n + 1) * CELL_WIDTH
+        height = (m + 1) * CELL_HEIGHT
+        self.canvas = tk.Canvas(parent, width=min(width, MAX_VIEW_WIDTH), height=min(height, MAX_VIEW_HEIGHT),
+                                bg='white', scrollregion=(0, 0, width, height), highlightthickness=0)
+        x_scroll = tk.Scrollbar(parent, orient='horizontal', command=self.xview)
+        y_scroll = tk.Scrollbar(parent, orient='vertical', command=self.yview)
+        self.canvas.configure(xscrollcommand=x_scroll.set, yscrollcommand=y_scroll.set)
+        self.canvas.grid(row=0, column=0, sticky='nsew')
+        y_scroll.grid(row=0, column=1, sticky='ns')
+        x_scroll.grid(row=1, column=0, sticky='ew')
+
+        self.canvas.bind('<Configure>', lambda event: self.redraw())
+        self.canvas.bind('<MouseWheel>', self.on_mouse_wheel)
+        self.canvas.bind('<Shift-MouseWheel>', self.on_mouse_wheel)
+        self.canvas.bind('<Button-4>', lambda event: self.yview('scroll', -1, 'units'))
+        self.canvas.bind('<Button-5>', lambda event: self.yview('scroll', 1, 'units'))
+
+    def xview(self, *args):
+        self.canvas.xview(*args)
+        self.redraw()
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.redraw()
+
+    def on_mouse_wheel(self, event):
+        units = -1 if event.delta > 0 else 1
+        if event.state & 0x1:  # Shift: desplazamiento horizontal
+            self.xview('scroll', units, 'units')
+        else:
+            self.yview('scroll', units, 'units')
+
+    def visible_range(self):
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        right = left + self.canvas.winfo_width()
+        bottom = top + self.canvas.winfo_height()
+        first_col = max(int(left // CELL_WIDTH) - 1, 0)
+        last_col = min(int(right // CELL_WIDTH), self.n)
+        first_row = max(int(top // CELL_HEIGHT) - 1, 0)
+        last_row = min(int(bottom // CELL_HEIGHT), self.m)
+        return range(first_row, last_row), range(first_col, last_col), left, top
+
+    def update(self, allocations, cells=None):
+        self.allocations = allocations
+        if cells is None:
+            cells = list(self.items)
+        for cell in cells:
+            items = self.items.get(cell)
+            if items is not None:
+                i, j = cell
+                self.canvas.itemconfigure(items[1], text=cell_text(allocations[i][j], self.cost_matrix[i][j]))
+        self.redraw()
+
+    def redraw(self):
+        if self.allocations is None:
+            return
+        rows, cols, left, top = self.visible_range()
+        visible = {(i, j) for i in rows for j in cols}
+
+        for cell in list(self.items):
+            if cell not in visible:
+                for item in self.items.pop(cell):
+                    self.canvas.delete(item)
+        for i, j in visible:
+            if (i, j) not in self.items:
+                x = (j + 1) * CELL_WIDTH
+                y = (i + 1) * CELL_HEIGHT
+                rectangle = self.canvas.create_rectangle(x, y, x + CELL_WIDTH, y + CELL_HEIGHT, outline='black')
+                text = self.canvas.create_text(x + CELL_WIDTH / 2, y + CELL_HEIGHT / 2, font=FONT, justify='center',
+                                               text=cell_text(self.allocations[i][j], self.cost_matrix[i][j]))
+                self.items[(i, j)] = (rectangle, text)
+
+        # Encabezados fijos en el borde visible superior e izquierdo
+        self.canvas.delete('header')
+        for j in cols:
+            x = (j + 1) * CELL_WIDTH
+            self.canvas.create_rectangle(x, top, x + CELL_WIDTH, top + CELL_HEIGHT, fill=HEADER_BG, tags='header')
+            self.canvas.create_text(x + CELL_WIDTH / 2, top + CELL_HEIGHT / 2, text=f"D{j+1}", font=FONT, tags='header')
+        for i in rows:
+            y = (i + 1) * CELL_HEIGHT
+            self.canvas.create_rectangle(left, y, left + CELL_WIDTH, y + CELL_HEIGHT, fill=HEADER_BG, tags='header')
+            self.canvas.create_text(left + CELL_WIDTH / 2, y + CELL_HEIGHT / 2, text=f"S{i+1}", font=FONT, tags='header')
+        self.canvas.create_rectangle(left, top, left + CELL_WIDTH, top + CELL_HEIGHT, fill=HEADER_BG, tags='header')
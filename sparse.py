@@ -0,0 +1,405 @@
+# sparse.py
+
+import bisect
+import math
+import time
+
+from methods import (
+    PIVOT_RULES,
+    BasisTree,
+    budget_description,
+    budget_exhausted,
+    iter_min_cost_flow_method,
+    make_basic,
+    method_code,
+    minimum_cost_allocations,
+    row_items,
+    vogel_allocations
+)
+
+class SparseCostMatrix:
+    # Costos de las rutas permitidas solamente, en formato CSR: la ruta k va de la
+    # fila i a la columna cols[k] con costo costs[k], para row_start[i] <= k <
+    # row_start[i + 1] y columnas crecientes dentro de cada fila. col_lanes guarda
+    # las rutas de cada columna (por filas crecientes) entre col_start[j] y
+    # col_start[j + 1]. Lo que no es ruta no se puede usar.
+    def __init__(self, m, n, lanes):
+        self.m, self.n = m, n
+        lanes = sorted((int(i), int(j), cost) for i, j, cost in lanes)
+        self.row_start = [0] * (m + 1)
+        self.cols = []
+        self.costs = []
+        previous = None
+        for i, j, cost in lanes:
+            if not (0 <= i < m and 0 <= j < n):
+                raise ValueError(f"La ruta ({i+1},{j+1}) está fuera de la matriz de costos.")
+            if (i, j) == previous:
+                raise ValueError(f"La ruta ({i+1},{j+1}) está repetida.")
+            previous = (i, j)
+            self.row_start[i + 1] += 1
+            self.cols.append(j)
+            self.costs.append(cost)
+        for i in range(m):
+            self.row_start[i + 1] += self.row_start[i]
+
+        self.col_start = [0] * (n + 1)
+        for j in self.cols:
+            self.col_start[j + 1] += 1
+        for j in range(n):
+            self.col_start[j + 1] += self.col_start[j]
+        self.col_lanes = [0] * len(self.cols)
+        position = self.col_start[:-1]
+        for k, j in enumerate(self.cols):
+            self.col_lanes[position[j]] = k
+            position[j] += 1
+
+    @classmethod
+    def from_dense(cls, cost_matrix, forbidden=None):
+        # Las celdas None, NaN o infinitas no son rutas; con forbidden tampoco lo son
+        # las de costo >= forbidden (los costos centinela de las matrices densas)
+        m = len(cost_matrix)
+        n = len(cost_matrix[0]) if m else 0
+        lanes = []
+        for i in range(m):
+            for j, cost in enumerate(cost_matrix[i]):
+                if cost is None or math.isnan(cost) or math.isinf(cost):
+                    continue
+                if forbidden is not None and cost >= forbidden:
+                    continue
+                lanes.append((i, j, cost))
+        return cls(m, n, lanes)
+
+    def __len__(self):
+        return len(self.cols)
+
+    def lane(self, i, j):
+        # Índice de la ruta (i, j) o None si no existe
+        start, end = self.row_start[i], self.row_start[i + 1]
+        k = bisect.bisect_left(self.cols, j, start, end)
+        return k if k < end and self.cols[k] == j else None
+
+    def cost(self, i, j):
+        k = self.lane(i, j)
+        return None if k is None else self.costs[k]
+
+    def row_costs(self):
+        # Una fila por proveedor como diccionario columna -> costo, el formato de
+        # filas dispersas que aceptan las funciones de methods.py
+        return [dict(zip(self.cols[self.row_start[i]:self.row_start[i + 1]],
+                         self.costs[self.row_start[i]:self.row_start[i + 1]]))
+                for i in range(self.m)]
+
+    def submatrix(self, rows, cols):
+        # Rutas entre las filas rows y las columnas cols (índices crecientes),
+        # renumeradas desde 0 en el orden de rows y cols
+        position = {j: b for b, j in enumerate(cols)}
+        lanes = [(a, position[self.cols[k]], self.costs[k])
+                 for a, i in enumerate(rows)
+                 for k in range(self.row_start[i], self.row_start[i + 1]) if self.cols[k] in position]
+        return SparseCostMatrix(len(rows), len(cols), lanes)
+
+    def to_dense(self, allocations):
+        # Pasa una asignación dispersa (filas columna -> cantidad) a una matriz completa
+        dense = [[0] * self.n for _ in range(self.m)]
+        for i, row in enumerate(allocations):
+            for j, allocation in row_items(row):
+                dense[i][j] = allocation
+        return dense
+
+# Heurísticas sobre las rutas. Si las rutas no alcanzan para repartir toda la
+# oferta, la asignación que devuelven queda incompleta.
+
+def sparse_northwest_corner_method(matrix, supply, demand, final_only=False):
+    return list(iter_sparse_northwest_corner_method(matrix, supply, demand, final_only))
+
+def iter_sparse_northwest_corner_method(matrix, supply, demand, final_only=False):
+    # Recorrer las rutas por filas y columnas es la esquina noroeste saltando las
+    # celdas que no son rutas
+    cell_order = [i * matrix.n + matrix.cols[k]
+                  for i in range(matrix.m) for k in range(matrix.row_start[i], matrix.row_start[i + 1])]
+    yield from sparse_steps(matrix, minimum_cost_allocations(supply, demand, cell_order), final_only)
+
+def sparse_minimum_cost_method(matrix, supply, demand, final_only=False):
+    return list(iter_sparse_minimum_cost_method(matrix, supply, demand, final_only))
+
+def iter_sparse_minimum_cost_method(matrix, supply, demand, final_only=False):
+    cell_order = sorted_lane_order(matrix)
+    yield from sparse_steps(matrix, minimum_cost_allocations(supply, demand, cell_order), final_only, True)
+
+def sparse_vogel_approximation_method(matrix, supply, demand, final_only=False):
+    return list(iter_sparse_vogel_approximation_method(matrix, supply, demand, final_only))
+
+def iter_sparse_vogel_approximation_method(matrix, supply, demand, final_only=False):
+    cost_rows = matrix.row_costs()
+    row_orders, col_orders = sorted_lane_orders(matrix)
+    allocations = vogel_allocations(cost_rows, supply, demand, row_orders, col_orders)
+    yield from sparse_steps(matrix, allocations, final_only)
+
+def sorted_lane_order(matrix):
+    # Índices planos (i * n + j) de las rutas ordenados por (costo, i, j)
+    order = [i * matrix.n + matrix.cols[k]
+             for i in range(matrix.m) for k in range(matrix.row_start[i], matrix.row_start[i + 1])]
+    costs = matrix.costs  # las rutas ya están en orden plano
+    return [order[k] for k in sorted(range(len(order)), key=costs.__getitem__)]
+
+def sorted_lane_orders(matrix):
+    # Como sorted_line_orders, pero cada orden contiene solo las rutas de la línea
+    cols, costs = matrix.cols, matrix.costs
+    row_orders = [[cols[k] for k in sorted(range(matrix.row_start[i], matrix.row_start[i + 1]),
+                                            key=costs.__getitem__)]
+                  for i in range(matrix.m)]
+    lane_rows = [0] * len(matrix)
+    for i in range(matrix.m):
+        for k in range(matrix.row_start[i], matrix.row_start[i + 1]):
+            lane_rows[k] = i
+    col_orders = [[lane_rows[k] for k in sorted(matrix.col_lanes[matrix.col_start[j]:matrix.col_start[j + 1]],
+                                                key=costs.__getitem__)]
+                  for j in range(matrix.n)]
+    return row_orders, col_orders
+
+def sparse_steps(matrix, allocations_iter, final_only, with_cost=False):
+    allocations = [{} for _ in range(matrix.m)]
+    description = None
+    for i, j, allocation in allocations_iter:
+        allocations[i][j] = allocation
+        description = f"Asignar {allocation} unidades a la celda ({i+1},{j+1})"
+        if with_cost:
+            description += f" con costo {matrix.cost(i, j)}"
+        if not final_only:
+            yield {'allocations': [row.copy() for row in allocations],
+                   'description': description}
+
+    if final_only and description is not None:
+        yield {'allocations': allocations, 'description': description}
+
+SPARSE_START_METHODS = {
+    'nwc': iter_sparse_northwest_corner_method,
+    'vam': iter_sparse_vogel_approximation_method,
+    'mcm': iter_sparse_minimum_cost_method,
+}
+
+def sparse_modi_method(matrix, supply, demand, start='mcm', final_only=False, big_m=None, instrumentation=None,
+                       pivot_rule='dantzig', max_iterations=None, time_limit=None):
+    return list(iter_sparse_modi_method(matrix, supply, demand, start, final_only, big_m, instrumentation,
+                                        pivot_rule, max_iterations, time_limit))
+
+def iter_sparse_modi_method(matrix, supply, demand, start='mcm', final_only=False, big_m=None, instrumentation=None,
+                            pivot_rule='dantzig', max_iterations=None, time_limit=None):
+    # MODI sobre las rutas: la base es el mismo BasisTree que en el caso denso y el
+    # costo reducido solo se evalúa en las rutas. Lo que la heurística inicial no pudo
+    # repartir, y las celdas que hagan falta para completar la base, van a celdas
+    # artificiales con costo big_m; si al final alguna sigue con envío, no hay rutas
+    # suficientes para cubrir la oferta y la demanda. pivot_rule, max_iterations y
+    # time_limit (segundos, contando la solución inicial) como en iter_modi_method.
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    if start not in SPARSE_START_METHODS:
+        raise ValueError("Solución inicial no reconocida.")
+    if pivot_rule not in PIVOT_RULES:
+        raise ValueError(f"Regla de pivoteo no reconocida: {pivot_rule}")
+    m, n = matrix.m, matrix.n
+    cost_rows = matrix.row_costs()
+    if big_m is None:
+        big_m = (m + n) * (max(map(abs, matrix.costs), default=0) + 1)
+
+    allocations = [dict.fromkeys(row, 0) for row in cost_rows]
+    initial_step = None
+    for initial_step in SPARSE_START_METHODS[start](matrix, supply, demand, final_only):
+        if not final_only:
+            yield initial_step
+    for i, row in enumerate(initial_step['allocations'] if initial_step else ()):
+        allocations[i].update(row)
+
+    artificial = add_artificial_cells(allocations, cost_rows, supply, demand, big_m)
+    make_basic(allocations, cost_rows, n)
+    total_cost = sparse_total_cost(allocations, cost_rows)
+    if not final_only:
+        description = f"Costo total inicial: {total_cost}"
+        if artificial:
+            description += f" (con {len(artificial)} celdas artificiales de costo {big_m})"
+        yield {'allocations': [row.copy() for row in allocations],
+               'description': description}
+
+    basis = BasisTree(allocations, cost_rows, n=n, strongly_feasible=pivot_rule == 'strongly_feasible')
+    if pivot_rule == 'strongly_feasible' and not basis.strongly_feasible:
+        pivot_rule = 'bland'  # Sin base de partida fuertemente factible la regla podría ciclar
+    iterations = 0
+    optimal = True
+    while True:
+        if budget_exhausted(iterations, max_iterations, deadline):
+            optimal = False
+            break
+        entering = find_entering_lane(allocations, cost_rows, basis, first=pivot_rule == 'bland')
+        if entering is None:
+            break  # La solución es óptima
+        i, j = entering
+        delta = cost_rows[i][j] - basis.potential[i] - basis.potential[m + j]
+        total_cost += delta * basis.pivot(allocations, i, j, instrumentation=instrumentation, rule=pivot_rule)
+        iterations += 1
+        if instrumentation is not None:
+            instrumentation.iteration(total_cost, entering)
+        if not final_only:
+            yield {'allocations': [row.copy() for row in allocations],
+                   'description': f"Se realizó un ajuste, nuevo costo total: {total_cost}"}
+
+    if any(allocations[i][j] > 0 for i, j in artificial):
+        if optimal:
+            raise ValueError("No hay rutas suficientes para cubrir la oferta y la demanda.")
+        # Una solución que aún usa celdas artificiales no es una solución sobre las rutas
+        raise ValueError("El presupuesto se agotó antes de cubrir la oferta y la demanda solo con las rutas.")
+    if optimal:
+        description = "Solución óptima encontrada con el Método MODI."
+        lower_bound = total_cost
+    else:
+        lower_bound = sparse_lower_bound(allocations, cost_rows, basis.potential, m, n)
+        description = budget_description(iterations, max_iterations, total_cost, lower_bound)
+    for i, j in artificial:
+        if matrix.lane(i, j) is None:
+            del allocations[i][j]
+    yield {'allocations': allocations if final_only else [row.copy() for row in allocations],
+           'description': description,
+           'lower_bound': lower_bound,
+           'gap': total_cost - lower_bound}
+
+def sparse_lower_bound(allocations, cost_rows, potential, m, n):
+    # Como calculate_lower_bound, pero el menor costo reducido de cada fila y columna
+    # se busca solo entre las rutas (y las celdas artificiales)
+    supply = [sum(row.values()) for row in allocations]
+    demand = [0] * n
+    row_min = [math.inf] * m
+    col_min = [math.inf] * n
+    for i in range(m):
+        for j, allocation in allocations[i].items():
+            demand[j] += allocation
+        for j, cost in cost_rows[i].items():
+            delta = cost - potential[i] - potential[m + j]
+            if delta < row_min[i]:
+                row_min[i] = delta
+            if delta < col_min[j]:
+                col_min[j] = delta
+    dual = sum(potential[i] * supply[i] for i in range(m)) + sum(potential[m + j] * demand[j] for j in range(n))
+    row_correction = sum(supply[i] * row_min[i] for i in range(m) if supply[i])
+    col_correction = sum(demand[j] * col_min[j] for j in range(n) if demand[j])
+    return dual + max(row_correction, col_correction)
+
+def add_artificial_cells(allocations, cost_rows, supply, demand, big_m):
+    # Reparte lo que falta por esquina noroeste entre las filas y columnas que no
+    # quedaron cubiertas y une las partes del grafo de rutas que estén separadas,
+    # para que exista una base. Devuelve las celdas artificiales añadidas.
+    m, n = len(supply), len(demand)
+    artificial = []
+
+    def add(i, j, allocation):
+        if j not in cost_rows[i]:
+            cost_rows[i][j] = big_m
+            allocations[i][j] = 0
+            artificial.append((i, j))
+        allocations[i][j] += allocation
+
+    rows = [[i, supply[i] - sum(allocations[i].values())] for i in range(m)]
+    cols = [[j, demand[j]] for j in range(n)]
+    for row in allocations:
+        for j, allocation in row.items():
+            cols[j][1] -= allocation
+    rows = [row for row in rows if row[1] > 0]
+    cols = [col for col in cols if col[1] > 0]
+    a = b = 0
+    while a < len(rows) and b < len(cols):
+        allocation = min(rows[a][1], cols[b][1])
+        add(rows[a][0], cols[b][0], allocation)
+        rows[a][1] -= allocation
+        cols[b][1] -= allocation
+        if not rows[a][1] > 0:
+            a += 1
+        if not cols[b][1] > 0:
+            b += 1
+
+    components = list(range(m + n))
+
+    def find(x):
+        while components[x] != x:
+            components[x] = components[components[x]]
+            x = components[x]
+        return x
+
+    for i in range(m):
+        for j in cost_rows[i]:
+            components[find(i)] = find(m + j)
+    for i in range(m):
+        if find(i) != find(m):
+            add(i, 0, 0)
+            components[find(i)] = find(m)
+    for j in range(n):
+        if find(m + j) != find(0):
+            add(0, j, 0)
+            components[find(m + j)] = find(0)
+    return artificial
+
+def find_entering_lane(allocations, cost_rows, basis, first=False):
+    # Como find_entering_cell, pero recorriendo solo las rutas (y celdas artificiales).
+    # Con first (regla de Bland), la de menor (fila, columna) con delta negativo: las
+    # celdas artificiales quedan al final de su fila, así que se recorre la fila entera.
+    m = basis.m
+    potential = basis.potential
+    min_delta = 0
+    entering = None
+    for i in range(m):
+        allocation_row = allocations[i]
+        u_i = potential[i]
+        for j, cost in cost_rows[i].items():
+            if allocation_row[j] == 0 and (i, j) not in basis.cells:
+                delta = cost - u_i - potential[m + j]
+                if first:
+                    if delta < 0 and (entering is None or j < entering[1]):
+                        entering = (i, j)
+                elif delta < min_delta:
+                    min_delta = delta
+                    entering = (i, j)
+        if first and entering is not None:
+            return entering
+    return entering
+
+def sparse_total_cost(allocations, cost_rows):
+    return sum(allocation * cost_rows[i][j] for i, row in enumerate(allocations) for j, allocation in row.items())
+
+def sparse_min_cost_flow_method(matrix, supply, demand, final_only=False, instrumentation=None):
+    return list(iter_sparse_min_cost_flow_method(matrix, supply, demand, final_only, instrumentation))
+
+def iter_sparse_min_cost_flow_method(matrix, supply, demand, final_only=False, instrumentation=None):
+    # Los caminos más cortos solo recorren las rutas; si al terminar queda oferta sin
+    # enviar es que las rutas no alcanzan
+    last_step = None
+    for step in iter_min_cost_flow_method(matrix.row_costs(), supply, demand, final_only, instrumentation):
+        if last_step is not None:
+            yield last_step
+        last_step = step
+    tolerance = 1e-9 * max(1, sum(supply))
+    if any(abs(sum(row.values()) - s) > tolerance for row, s in zip(last_step['allocations'], supply)):
+        raise ValueError("No hay rutas suficientes para cubrir la oferta y la demanda.")
+    yield last_step
+
+def sparse_solve(method, matrix, supply, demand, final_only=False, start='mcm', pivot_rule='dantzig',
+                 max_iterations=None, time_limit=None):
+    return list(iter_sparse_solve(method, matrix, supply, demand, final_only, start, pivot_rule,
+                                  max_iterations, time_limit))
+
+def iter_sparse_solve(method, matrix, supply, demand, final_only=False, start='mcm', pivot_rule='dantzig',
+                      max_iterations=None, time_limit=None):
+    # Como iter_solve para una SparseCostMatrix; las asignaciones de cada paso son
+    # filas columna -> cantidad (matrix.to_dense las pasa a una matriz completa).
+    # pivot_rule, max_iterations y time_limit se pasan a MODI (1.5).
+    if len(supply) != matrix.m or len(demand) != matrix.n:
+        raise ValueError("Las dimensiones de la matriz de costos no coinciden con la oferta y la demanda.")
+    code = method_code(method)
+    if code == '1.1':
+        yield from iter_sparse_northwest_corner_method(matrix, supply, demand, final_only)
+    elif code == '1.2':
+        yield from iter_sparse_vogel_approximation_method(matrix, supply, demand, final_only)
+    elif code == '1.3':
+        yield from iter_sparse_minimum_cost_method(matrix, supply, demand, final_only)
+    elif code == '1.5':
+        yield from iter_sparse_modi_method(matrix, supply, demand, start, final_only, pivot_rule=pivot_rule,
+                                           max_iterations=max_iterations, time_limit=time_limit)
+    elif code == '1.6':
+        yield from iter_sparse_min_cost_flow_method(matrix, supply, demand, final_only)
+    else:
+        raise ValueError("El Método del Paso Secuencial no admite instancias dispersas; use MODI (1.5) o 1.6.")
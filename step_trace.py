@@ -0,0 +1,184 @@
+# step_trace.py
+
+import json
+import struct
+import zlib
+from array import array
+
+MAGIC = b'STRC'
+VERSION = 1
+HEADER = struct.Struct('<4sBIIIIc')
+
+class StepTrace:
+    # Secuencia de pasos que guarda solo las celdas que cambian en cada paso y una
+    # copia completa (keyframe) cada keyframe_interval pasos. Se indexa como la
+    # lista de pasos: trace[k] devuelve {'allocations': ..., 'description': ...}.
+    def __init__(self, m, n, keyframe_interval=32):
+        self.m, self.n = m, n
+        self.keyframe_interval = keyframe_interval
+        self.descriptions = []
+        self.changes = []  # por paso: lista de (i, j, valor anterior, valor nuevo)
+        self.extras = {}  # claves adicionales de algunos pasos
+        self.keyframes = {}
+        self._last = [[0] * n for _ in range(m)]
+        self._current = [[0] * n for _ in range(m)]
+        self._cursor = -1
+
+    @classmethod
+    def from_steps(cls, steps, keyframe_interval=32):
+        trace = None
+        for step in steps:
+            if trace is None:
+                allocations = step['allocations']
+                trace = cls(len(allocations), len(allocations[0]), keyframe_interval)
+            trace.append(step)
+        return trace
+
+    def __len__(self):
+        return len(self.descriptions)
+
+    def __getitem__(self, k):
+        k = self._index(k)
+        step = {'allocations': [row.copy() for row in self.allocations_at(k)],
+                'description': self.descriptions[k]}
+        step.update(self.extras.get(k, {}))
+        return step
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def append(self, step):
+        allocations = step['allocations']
+        last = self._last
+        changed = []
+        for i in range(self.m):
+            new_row, last_row = allocations[i], last[i]
+            for j in range(self.n):
+                if new_row[j] != last_row[j]:
+                    changed.append((i, j, last_row[j], new_row[j]))
+                    last_row[j] = new_row[j]
+        self._add(changed, step['description'],
+                  {key: value for key, value in step.items() if key not in ('allocations', 'description')})
+
+    def _add(self, changed, description, extras):
+        k = len(self.descriptions)
+        self.changes.append(changed)
+        self.descriptions.append(description)
+        if extras:
+            self.extras[k] = extras
+        if k % self.keyframe_interval == 0:
+            self.keyframes[k] = [row.copy() for row in self._last]
+
+    def _index(self, k):
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError("Paso fuera de rango.")
+        return k
+
+    def view(self):
+        # Otra traza sobre los mismos pasos, con su propia posición de lectura: se
+        # puede recorrer a la vez que el original (p. ej. desde otro hilo) sin copiar
+        # los pasos. Es de solo lectura.
+        view = type(self).__new__(type(self))
+        view.__dict__.update(self.__dict__)
+        view._last = None
+        view._current = [[0] * self.n for _ in range(self.m)]
+        view._cursor = -1
+        return view
+
+    def estimated_bytes(self):
+        # Estimación aproximada de la memoria que ocupan los pasos: unos 120 bytes por
+        # celda cambiada (tupla y valores), 16 por celda de cada keyframe y de las
+        # matrices de trabajo, más las descripciones
+        cells = (len(self.keyframes) + 2) * self.m * self.n
+        return (120 * sum(map(len, self.changes)) + 16 * cells
+                + sum(len(description) + 64 for description in self.descriptions))
+
+    def description(self, k):
+        return self.descriptions[self._index(k)]
+
+    def allocations_at(self, k):
+        # Asignaciones del paso k sin copiar: la matriz devuelta no debe modificarse
+        # y deja de ser válida al consultar otro paso.
+        k = self._index(k)
+        if abs(k - self._cursor) > self.keyframe_interval or self._cursor < 0:
+            base = k - k % self.keyframe_interval
+            for row, keyframe_row in zip(self._current, self.keyframes[base]):
+                row[:] = keyframe_row
+            self._cursor = base
+        current = self._current
+        while self._cursor < k:
+            self._cursor += 1
+            for i, j, _, new in self.changes[self._cursor]:
+                current[i][j] = new
+        while self._cursor > k:
+            for i, j, old, _ in self.changes[self._cursor]:
+                current[i][j] = old
+            self._cursor -= 1
+        return current
+
+    def changed_cells(self, a, b):
+        # Celdas cuyo valor puede diferir entre los pasos a y b
+        a, b = sorted((self._index(a), self._index(b)))
+        return {(i, j) for k in range(a + 1, b + 1) for i, j, _, _ in self.changes[k]}
+
+    def save(self, path):
+        values = [new for changed in self.changes for _, _, _, new in changed]
+        integral = all(isinstance(value, int) and not isinstance(value, bool) for value in values)
+        typecode = 'q' if integral else 'd'
+
+        body = bytearray()
+        for description, changed in zip(self.descriptions, self.changes):
+            encoded = description.encode('utf-8')
+            body += struct.pack('<II', len(encoded), len(changed))
+            body += encoded
+            body += array('Q', [i * self.n + j for i, j, _, _ in changed]).tobytes()
+            body += array(typecode, [new for _, _, _, new in changed]).tobytes()
+        extras = json.dumps({str(k): v for k, v in self.extras.items()}).encode('utf-8')
+        body += struct.pack('<I', len(extras)) + extras
+
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.m, self.n, self.keyframe_interval,
+                                   len(self), typecode.encode('ascii')))
+            file.write(zlib.compress(bytes(body)))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            header = file.read(HEADER.size)
+            body = zlib.decompress(file.read())
+        magic, version, m, n, keyframe_interval, num_steps, typecode = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("El archivo no contiene una traza de pasos válida.")
+        typecode = typecode.decode('ascii')
+
+        trace = cls(m, n, keyframe_interval)
+        value_size = array(typecode).itemsize
+        offset = 0
+        for _ in range(num_steps):
+            length, count = struct.unpack_from('<II', body, offset)
+            offset += 8
+            description = body[offset:offset + length].decode('utf-8')
+            offset += length
+            cells = array('Q')
+            cells.frombytes(body[offset:offset + 8 * count])
+            offset += 8 * count
+            values = array(typecode)
+            values.frombytes(body[offset:offset + value_size * count])
+            offset += value_size * count
+
+            # Los valores anteriores se reconstruyen reproduciendo la traza
+            changed = []
+            for cell, new in zip(cells, values):
+                i, j = divmod(cell, n)
+                changed.append((i, j, trace._last[i][j], new))
+                trace._last[i][j] = new
+            trace._add(changed, description, None)
+
+        length, = struct.unpack_from('<I', body, offset)
+        offset += 4
+        extras = json.loads(body[offset:offset + length].decode('utf-8'))
+        trace.extras = {int(k): v for k, v in extras.items()}
+        return trace